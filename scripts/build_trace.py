@@ -0,0 +1,209 @@
+"""
+Timing spans, counters and optional profiling for registry build stages
+
+Each build script wraps its main body in `tracing('<stage>')` and marks
+interesting work with `current().span(...)`. Shared I/O helpers report bytes
+read/written and JSON parse time through `current()`, so stages get those
+counters for free. Output is controlled with environment variables:
+
+    REGISTRY_TRACE_DIR   write {stage}.trace.json (Chrome trace-event format,
+                         open in chrome://tracing or Perfetto) and
+                         {stage}.summary.json (machine-readable totals)
+    REGISTRY_PROFILE     comma-separated: `cprofile` writes {stage}.prof,
+                         `tracemalloc` adds peak memory and top allocation
+                         sites to the summary
+
+Without REGISTRY_TRACE_DIR spans are still collected in memory (they are
+cheap) but nothing is written and no profiler is started.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+TRACE_DIR_ENV = 'REGISTRY_TRACE_DIR'
+PROFILE_ENV = 'REGISTRY_PROFILE'
+TRACEMALLOC_TOP = 10
+
+class NullTracer:
+    """Tracer used outside of `tracing()`; records nothing"""
+
+    @contextmanager
+    def span(self, name, category='stage', **args):
+        yield
+
+    @contextmanager
+    def timed(self, counter):
+        yield
+
+    def count(self, name, value=1):
+        pass
+
+class BuildTracer:
+    """Collects spans and counters for one build stage"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.pid = os.getpid()
+        self.started_at = datetime.now(timezone.utc)
+        self.origin = time.perf_counter()
+        self.events = []
+        self.counters = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def _now_us(self):
+        return (time.perf_counter() - self.origin) * 1e6
+
+    @contextmanager
+    def span(self, name, category='stage', **args):
+        """Record a complete ('X') trace event around the block"""
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round(start, 3),
+                'dur': round(self._now_us() - start, 3),
+                'pid': self.pid,
+                'tid': threading.get_ident()
+            }
+            if args:
+                event['args'] = args
+            with self._lock:
+                self.events.append(event)
+
+    @contextmanager
+    def timed(self, counter):
+        """Add the block's wall time in seconds to a counter"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.count(counter, time.perf_counter() - start)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def span_totals(self):
+        """Aggregate spans by category and name"""
+        totals = {}
+        for event in self.events:
+            key = f'{event["cat"]}:{event["name"]}'
+            total = totals.setdefault(key, {'count': 0, 'totalMs': 0.0, 'maxMs': 0.0})
+            duration_ms = event['dur'] / 1000
+            total['count'] += 1
+            total['totalMs'] += duration_ms
+            total['maxMs'] = max(total['maxMs'], duration_ms)
+        for total in totals.values():
+            total['totalMs'] = round(total['totalMs'], 3)
+            total['maxMs'] = round(total['maxMs'], 3)
+        return totals
+
+    def trace_events(self):
+        """Spans plus one counter ('C') event per counter at the end of the run"""
+        end = round(self._now_us(), 3)
+        counter_events = [
+            {'name': name, 'ph': 'C', 'ts': end, 'pid': self.pid, 'tid': 0, 'args': {name: value}}
+            for name, value in sorted(self.counters.items())
+        ]
+        return sorted(self.events, key=lambda e: e['ts']) + counter_events
+
+    def category_totals(self):
+        """Aggregate spans by category only (e.g. all file reads together)"""
+        totals = {}
+        for event in self.events:
+            total = totals.setdefault(event['cat'], {'count': 0, 'totalMs': 0.0})
+            total['count'] += 1
+            total['totalMs'] += event['dur'] / 1000
+        for total in totals.values():
+            total['totalMs'] = round(total['totalMs'], 3)
+        return totals
+
+    def summary(self, wall_seconds):
+        counters = {
+            name: round(value, 6) if isinstance(value, float) and not value.is_integer() else int(value)
+            for name, value in sorted(self.counters.items())
+        }
+        return {
+            'stage': self.stage,
+            'startedAt': self.started_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'wallSeconds': round(wall_seconds, 6),
+            'counters': counters,
+            'categories': self.category_totals(),
+            'spans': self.span_totals()
+        }
+
+_active = NullTracer()
+
+def current():
+    """Return the tracer of the running stage (a no-op tracer if none)"""
+    return _active
+
+def _profile_options():
+    return {option.strip() for option in os.environ.get(PROFILE_ENV, '').split(',') if option.strip()}
+
+def _tracemalloc_report(snapshot, peak):
+    stats = snapshot.statistics('lineno')[:TRACEMALLOC_TOP]
+    return {
+        'peakBytes': peak,
+        'top': [
+            {'site': str(stat.traceback[0]), 'bytes': stat.size, 'blocks': stat.count}
+            for stat in stats
+        ]
+    }
+
+@contextmanager
+def tracing(stage):
+    """Trace a build stage and write its outputs when REGISTRY_TRACE_DIR is set"""
+    global _active
+    trace_dir = os.environ.get(TRACE_DIR_ENV)
+    options = _profile_options() if trace_dir else set()
+
+    tracer = BuildTracer(stage)
+    previous, _active = _active, tracer
+
+    profiler = None
+    if 'cprofile' in options:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if 'tracemalloc' in options:
+        import tracemalloc
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    try:
+        with tracer.span(stage, 'build'):
+            yield tracer
+    finally:
+        wall_seconds = time.perf_counter() - started
+        _active = previous
+
+        if profiler is not None:
+            profiler.disable()
+        summary = tracer.summary(wall_seconds)
+        if 'tracemalloc' in options:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            summary['tracemalloc'] = _tracemalloc_report(snapshot, peak)
+
+        if trace_dir:
+            out_dir = Path(trace_dir)
+            out_dir.mkdir(parents=True, exist_ok=True)
+            with open(out_dir / f'{stage}.trace.json', 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': tracer.trace_events(), 'displayTimeUnit': 'ms'}, f)
+            with open(out_dir / f'{stage}.summary.json', 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            if profiler is not None:
+                profiler.dump_stats(out_dir / f'{stage}.prof')
+            print(f'[TRACE] {stage}: {summary["wallSeconds"]}s, trace written to {out_dir}')
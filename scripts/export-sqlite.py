@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Export the whole registry into a single SQLite database for offline queries
+
+The database is built from the same metadata walk as the JSON indexes
+(registry_data.load_registry) and contains normalized tables for agents,
+versions, tags, categories and localized strings, plus two FTS5 indexes over
+the localized names and descriptions:
+
+    search_words  unicode61 tokenizer, word search for all languages
+    search_cjk    trigram tokenizer over zh/ja text, since Chinese and
+                  Japanese have no spaces for unicode61 to split on
+
+All rows are bulk-inserted in one transaction into a temporary file which
+then atomically replaces the output.
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+from pathlib import Path
+
+from build_trace import current as current_tracer, tracing
+from registry_categories import get_correct_categories
+from registry_data import load_registry
+from registry_sqlite import LANGUAGES, SCHEMA, SCHEMA_VERSION, collect_rows, insert_rows
+
+OUTPUT_FILE = Path('index/registry.sqlite')
+
+def build_database(output_file, registry, categories):
+    """Write the database to a temporary file and atomically move it into place"""
+    tracer = current_tracer()
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    if tmp_file.exists():
+        tmp_file.unlink()
+
+    with tracer.span('collect-rows'):
+        rows = collect_rows(registry, categories)
+
+    conn = sqlite3.connect(tmp_file, isolation_level=None)
+    try:
+        # The file is thrown away on failure, so durability is not needed
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('PRAGMA page_size = 4096')
+
+        with tracer.span('bulk-insert'):
+            conn.execute('BEGIN')
+            # executescript() would commit first, so run the DDL statement by statement
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.executemany('INSERT INTO registry_info VALUES (?, ?)', [
+                ('schemaVersion', str(SCHEMA_VERSION)),
+                ('totalAgents', str(len(rows['agents']))),
+                ('languages', ','.join(LANGUAGES))
+            ])
+            for table, table_rows in rows.items():
+                insert_rows(conn, table, table_rows)
+            conn.execute('COMMIT')
+
+        with tracer.span('optimize'):
+            conn.execute("INSERT INTO search_words (search_words) VALUES ('optimize')")
+            conn.execute("INSERT INTO search_cjk (search_cjk) VALUES ('optimize')")
+            conn.execute('ANALYZE')
+            conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+    os.replace(tmp_file, output_file)
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
+def search(db_file, query, lang=None, limit=20):
+    """Full-text search: trigram index for CJK text, word index otherwise
+
+    Trigram MATCH needs at least three characters, so shorter CJK queries
+    fall back to a LIKE scan of the (small) trigram table.
+    """
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    try:
+        has_cjk = any('\u3040' <= ch <= '\u30ff' or '\u4e00' <= ch <= '\u9fff' for ch in query)
+        if has_cjk and len(query) < 3:
+            pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            where = "(s.name LIKE ? ESCAPE '\\' OR s.description LIKE ? ESCAPE '\\')"
+            table, params, rank = 'search_cjk', [pattern, pattern], '0'
+        else:
+            table = 'search_cjk' if has_cjk else 'search_words'
+            where = f'{table} MATCH ?'
+            params, rank = ['"' + query.replace('"', '""') + '"'], 's.rank'
+        if lang:
+            where += ' AND s.lang = ?'
+            params.append(lang)
+        sql = f'''
+            SELECT a.author, a.agent_id, s.lang, s.name, min({rank}) AS best
+            FROM {table} s JOIN agents a ON a.id = s.agent
+            WHERE {where}
+            GROUP BY a.id ORDER BY best, a.downloads DESC LIMIT ?
+        '''
+        return conn.execute(sql, params + [limit]).fetchall()
+    finally:
+        conn.close()
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Export the registry as a SQLite FTS5 database')
+    parser.add_argument('--output', default=OUTPUT_FILE, type=Path, help='Database file to write')
+    parser.add_argument('--query', help='Search the exported database instead of rebuilding it')
+    parser.add_argument('--lang', choices=LANGUAGES, help='Restrict --query to one language')
+    args = parser.parse_args()
+
+    # Change to registry directory
+    script_dir = Path(__file__).parent
+    registry_dir = script_dir.parent
+    os.chdir(registry_dir)
+
+    if args.query:
+        if not args.output.exists():
+            print(f'[ERROR] {args.output} not found, run without --query first')
+            sys.exit(1)
+        for author, agent_id, lang, name, _ in search(args.output, args.query, args.lang):
+            print(f'  {author}/{agent_id} [{lang}] {name}')
+        return
+
+    with tracing('export-sqlite'):
+        print('Loading registry...')
+        with current_tracer().span('load-registry'):
+            registry = load_registry()
+        counts = build_database(args.output, registry, get_correct_categories())
+
+    print(f'Exported {counts["agents"]} agents to {args.output} ({args.output.stat().st_size} bytes)')
+    for table, count in counts.items():
+        print(f'  {table}: {count} rows')
+
+if __name__ == '__main__':
+    main()
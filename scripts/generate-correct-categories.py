@@ -4,358 +4,103 @@ Generate category index files based on the exact README structure
 """
 
 import os
-import json
-import random
 from pathlib import Path
 
-def load_registry():
-    """Load the main registry file"""
-    with open('registry.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+from build_trace import current as current_tracer, tracing
+from registry_categories import (CATEGORIES_DIR, FEATURED_FILE, MAIN_FILE, build_category_file,
+                                 build_featured_file, categorize_agents_correctly, main_with_counts)
+from registry_data import dump_json, load_registry, read_json, write_json
 
-def get_correct_categories():
-    """Define the exact categories from README"""
-    return {
-        'core-architecture': {
-            'name': {
-                'en': 'Core Architecture',
-                'zh': '核心架构',
-                'ja': 'コアアーキテクチャ'
-            },
-            'description': {
-                'en': 'Backend APIs, system architecture, and cloud infrastructure design',
-                'zh': '后端API、系统架构和云基础设施设计',
-                'ja': 'バックエンドAPI、システムアーキテクチャ、クラウドインフラ設計'
-            },
-            'agents': ['backend-architect', 'frontend-developer', 'graphql-architect', 'architect-review', 'cloud-architect', 'hybrid-cloud-architect', 'kubernetes-architect']
-        },
-        'ui-mobile': {
-            'name': {
-                'en': 'UI/UX & Mobile',
-                'zh': 'UI/UX与移动端',
-                'ja': 'UI/UX・モバイル'
-            },
-            'description': {
-                'en': 'User interface design, mobile development, and visual validation',
-                'zh': '用户界面设计、移动开发和视觉验证',
-                'ja': 'ユーザーインターフェース設計、モバイル開発、ビジュアル検証'
-            },
-            'agents': ['ui-ux-designer', 'ui-visual-validator', 'mobile-developer', 'ios-developer', 'flutter-expert']
-        },
-        'systems-programming': {
-            'name': {
-                'en': 'Systems & Low-Level Programming',
-                'zh': '系统与底层编程',
-                'ja': 'システム・低レベルプログラミング'
-            },
-            'description': {
-                'en': 'System programming, memory management, and performance-critical applications',
-                'zh': '系统编程、内存管理和性能关键应用',
-                'ja': 'システムプログラミング、メモリ管理、パフォーマンス重視アプリケーション'
-            },
-            'agents': ['c-pro', 'cpp-pro', 'rust-pro', 'golang-pro']
-        },
-        'web-programming': {
-            'name': {
-                'en': 'Web & Application Programming',
-                'zh': 'Web与应用程序编程',
-                'ja': 'Web・アプリケーションプログラミング'
-            },
-            'description': {
-                'en': 'Modern web development with JavaScript, Python, and other dynamic languages',
-                'zh': '使用JavaScript、Python等动态语言进行现代Web开发',
-                'ja': 'JavaScript、Pythonなどの動的言語によるモダンWeb開発'
-            },
-            'agents': ['javascript-pro', 'typescript-pro', 'python-pro', 'ruby-pro', 'php-pro']
-        },
-        'enterprise-programming': {
-            'name': {
-                'en': 'Enterprise & JVM Programming',
-                'zh': '企业与JVM编程',
-                'ja': 'エンタープライズ・JVMプログラミング'
-            },
-            'description': {
-                'en': 'Enterprise-grade development with Java, Scala, and .NET platforms',
-                'zh': '使用Java、Scala和.NET平台进行企业级开发',
-                'ja': 'Java、Scala、.NETプラットフォームによるエンタープライズ開発'
-            },
-            'agents': ['java-pro', 'scala-pro', 'csharp-pro']
-        },
-        'specialized-platforms': {
-            'name': {
-                'en': 'Specialized Platforms',
-                'zh': '专业平台',
-                'ja': '専門プラットフォーム'
-            },
-            'description': {
-                'en': 'Domain-specific programming platforms and frameworks',
-                'zh': '特定领域的编程平台和框架',
-                'ja': 'ドメイン固有のプログラミングプラットフォームとフレームワーク'
-            },
-            'agents': ['elixir-pro', 'unity-developer', 'minecraft-bukkit-pro', 'sql-pro']
-        },
-        'devops-deployment': {
-            'name': {
-                'en': 'DevOps & Deployment',
-                'zh': 'DevOps与部署',
-                'ja': 'DevOps・デプロイメント'
-            },
-            'description': {
-                'en': 'CI/CD pipelines, containerization, and infrastructure automation',
-                'zh': 'CI/CD管道、容器化和基础设施自动化',
-                'ja': 'CI/CDパイプライン、コンテナ化、インフラ自動化'
-            },
-            'agents': ['devops-troubleshooter', 'deployment-engineer', 'terraform-specialist', 'dx-optimizer']
-        },
-        'database-management': {
-            'name': {
-                'en': 'Database Management',
-                'zh': '数据库管理',
-                'ja': 'データベース管理'
-            },
-            'description': {
-                'en': 'Database optimization, administration, and performance tuning',
-                'zh': '数据库优化、管理和性能调优',
-                'ja': 'データベース最適化、管理、パフォーマンスチューニング'
-            },
-            'agents': ['database-optimizer', 'database-admin']
-        },
-        'incident-network': {
-            'name': {
-                'en': 'Incident Response & Network',
-                'zh': '事件响应与网络',
-                'ja': 'インシデント対応・ネットワーク'
-            },
-            'description': {
-                'en': 'Production incident management and network operations',
-                'zh': '生产事件管理和网络运维',
-                'ja': '本番インシデント管理とネットワーク運用'
-            },
-            'agents': ['incident-responder', 'network-engineer']
-        },
-        'code-quality': {
-            'name': {
-                'en': 'Code Quality & Review',
-                'zh': '代码质量与审查',
-                'ja': 'コード品質・レビュー'
-            },
-            'description': {
-                'en': 'Code review, security auditing, and best practices enforcement',
-                'zh': '代码审查、安全审计和最佳实践执行',
-                'ja': 'コードレビュー、セキュリティ監査、ベストプラクティス実施'
-            },
-            'agents': ['code-reviewer', 'security-auditor', 'backend-security-coder', 'frontend-security-coder', 'mobile-security-coder']
-        },
-        'testing-debugging': {
-            'name': {
-                'en': 'Testing & Debugging',
-                'zh': '测试与调试',
-                'ja': 'テスト・デバッグ'
-            },
-            'description': {
-                'en': 'Test automation, debugging, and error analysis',
-                'zh': '测试自动化、调试和错误分析',
-                'ja': 'テスト自動化、デバッグ、エラー解析'
-            },
-            'agents': ['test-automator', 'tdd-orchestrator', 'debugger', 'error-detective']
-        },
-        'performance-observability': {
-            'name': {
-                'en': 'Performance & Observability',
-                'zh': '性能与可观测性',
-                'ja': 'パフォーマンス・可観測性'
-            },
-            'description': {
-                'en': 'Application performance optimization and monitoring',
-                'zh': '应用性能优化和监控',
-                'ja': 'アプリケーションパフォーマンス最適化とモニタリング'
-            },
-            'agents': ['performance-engineer', 'observability-engineer', 'search-specialist']
-        },
-        'data-analytics': {
-            'name': {
-                'en': 'Data Engineering & Analytics',
-                'zh': '数据工程与分析',
-                'ja': 'データエンジニアリング・分析'
-            },
-            'description': {
-                'en': 'Data processing, analytics, and business intelligence',
-                'zh': '数据处理、分析和商业智能',
-                'ja': 'データ処理、分析、ビジネスインテリジェンス'
-            },
-            'agents': ['data-scientist', 'data-engineer']
-        },
-        'machine-learning': {
-            'name': {
-                'en': 'Machine Learning & AI',
-                'zh': '机器学习与人工智能',
-                'ja': '機械学習・AI'
-            },
-            'description': {
-                'en': 'ML pipelines, AI applications, and prompt engineering',
-                'zh': 'ML管道、AI应用和提示工程',
-                'ja': 'MLパイプライン、AIアプリケーション、プロンプトエンジニアリング'
-            },
-            'agents': ['ai-engineer', 'ml-engineer', 'mlops-engineer', 'prompt-engineer']
-        },
-        'documentation': {
-            'name': {
-                'en': 'Documentation & Technical Writing',
-                'zh': '文档与技术写作',
-                'ja': 'ドキュメント・技術文書'
-            },
-            'description': {
-                'en': 'Technical documentation, API specs, and content creation',
-                'zh': '技术文档、API规范和内容创建',
-                'ja': '技術文書、API仕様、コンテンツ作成'
-            },
-            'agents': ['docs-architect', 'api-documenter', 'reference-builder', 'tutorial-engineer', 'mermaid-expert']
-        },
-        'business-finance': {
-            'name': {
-                'en': 'Business Analysis & Finance',
-                'zh': '业务分析与金融',
-                'ja': 'ビジネス分析・金融'
-            },
-            'description': {
-                'en': 'Business metrics, financial modeling, and risk analysis',
-                'zh': '业务指标、金融建模和风险分析',
-                'ja': 'ビジネスメトリクス、金融モデリング、リスク分析'
-            },
-            'agents': ['business-analyst', 'quant-analyst', 'risk-manager']
-        },
-        'marketing-sales': {
-            'name': {
-                'en': 'Marketing & Sales',
-                'zh': '营销与销售',
-                'ja': 'マーケティング・営業'
-            },
-            'description': {
-                'en': 'Content marketing, sales automation, and customer engagement',
-                'zh': '内容营销、销售自动化和客户参与',
-                'ja': 'コンテンツマーケティング、営業自動化、顧客エンゲージメント'
-            },
-            'agents': ['content-marketer', 'sales-automator']
-        },
-        'support-legal': {
-            'name': {
-                'en': 'Support & Legal',
-                'zh': '支持与法务',
-                'ja': 'サポート・法務'
-            },
-            'description': {
-                'en': 'Customer support, HR operations, and legal compliance',
-                'zh': '客户支持、人力资源运营和法律合规',
-                'ja': 'カスタマーサポート、人事運営、法的コンプライアンス'
-            },
-            'agents': ['customer-support', 'hr-pro', 'legal-advisor']
-        },
-        'specialized-domains': {
-            'name': {
-                'en': 'Specialized Domains',
-                'zh': '专业领域',
-                'ja': '専門領域'
-            },
-            'description': {
-                'en': 'Blockchain, payments, legacy modernization, and specialized tools',
-                'zh': '区块链、支付、遗留系统现代化和专业工具',
-                'ja': 'ブロックチェーン、決済、レガシーモダナイゼーション、専門ツール'
-            },
-            'agents': ['blockchain-developer', 'payment-integration', 'legacy-modernizer', 'context-manager']
-        },
-        'seo-content': {
-            'name': {
-                'en': 'SEO & Content Optimization',
-                'zh': 'SEO与内容优化',
-                'ja': 'SEO・コンテンツ最適化'
-            },
-            'description': {
-                'en': 'Search engine optimization, content strategy, and digital marketing',
-                'zh': '搜索引擎优化、内容策略和数字营销',
-                'ja': '検索エンジン最適化、コンテンツ戦略、デジタルマーケティング'
-            },
-            'agents': ['seo-content-auditor', 'seo-meta-optimizer', 'seo-keyword-strategist', 'seo-structure-architect', 'seo-snippet-hunter', 'seo-content-refresher', 'seo-cannibalization-detector', 'seo-authority-builder', 'seo-content-writer', 'seo-content-planner']
-        }
-    }
+def generate_category_file(category_name, category_data, output_dir, details):
+    """Generate a category index file with slim list records
 
-def categorize_agents_correctly(registry):
-    """Categorize agents based on the exact README structure"""
-    categories = get_correct_categories()
-    categorized = {cat: {'meta': categories[cat], 'agents': []} for cat in categories}
-    
-    # Create agent lookup
-    agent_lookup = {}
-    for agent_key, agent_data in registry['agents'].items():
-        agent_lookup[agent_data['id']] = agent_data
-    
-    # Assign agents to categories based on exact mapping
-    for cat_name, cat_data in categories.items():
-        for agent_id in cat_data['agents']:
-            if agent_id in agent_lookup:
-                agent_data = agent_lookup[agent_id]
-                # Add random ratings and downloads if missing
-                if 'rating' not in agent_data or agent_data['rating'] == 0:
-                    agent_data['rating'] = round(random.uniform(3.0, 5.0), 1)
-                if 'downloads' not in agent_data or agent_data['downloads'] == 0:
-                    agent_data['downloads'] = random.randint(50, 2000)
-                
-                categorized[cat_name]['agents'].append(agent_data)
-    
-    return categorized
-
-def generate_category_file(category_name, category_data, output_dir):
-    """Generate a category index file"""
-    meta = category_data['meta']
+    Returns the agent count and the size of the list file with full and
+    with slim records.
+    """
     agents = category_data['agents']
-    
-    # Sort by downloads (descending)
-    agents.sort(key=lambda x: x.get('downloads', 0), reverse=True)
-    
-    category_file = {
-        'category': category_name,
-        'name': meta['name'],
-        'description': meta['description'],
-        'lastUpdated': '2025-09-29T03:10:00Z',
-        'totalAgents': len(agents),
-        'agents': agents
-    }
+    category_file = build_category_file(category_name, category_data, details)
     
     output_file = output_dir / f'{category_name}.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(category_file, f, indent=2, ensure_ascii=False)
+    slim_size = len(write_json(output_file, category_file))
+    full_size = len(dump_json(dict(category_file, agents=agents)))
     
     print(f'Generated {output_file} with {len(agents)} agents')
-    return len(agents)
+    return len(agents), full_size, slim_size
 
-def main():
-    """Main function"""
-    # Change to registry directory
-    script_dir = Path(__file__).parent
-    registry_dir = script_dir.parent
-    os.chdir(registry_dir)
+def generate_categories():
+    """Load the registry and write every category index"""
+    tracer = current_tracer()
     
     print('Loading registry...')
-    registry = load_registry()
+    with tracer.span('load-registry'):
+        registry = load_registry()
     
     print('Categorizing agents according to README structure...')
-    categorized = categorize_agents_correctly(registry)
+    with tracer.span('categorize'):
+        categorized = categorize_agents_correctly(registry)
     
     # Create output directory
-    output_dir = Path('index/categories')
+    output_dir = CATEGORIES_DIR
     output_dir.mkdir(parents=True, exist_ok=True)
     
     print('Generating category files...')
     total_agents = 0
+    sizes = {}
+    details = {}
     for category_name, category_data in categorized.items():
         if category_data['agents']:  # Only create files for non-empty categories
-            agent_count = generate_category_file(category_name, category_data, output_dir)
+            with tracer.span(category_name, 'category'):
+                agent_count, full_size, slim_size = generate_category_file(
+                    category_name, category_data, output_dir, details)
             total_agents += agent_count
+            sizes[category_name] = (full_size, slim_size)
+    
+    # Featured records are curated; refresh their synced fields and detail references
+    featured = None
+    if FEATURED_FILE.exists():
+        featured = read_json(FEATURED_FILE)
+        agents = {(agent['author'], agent['id']): agent for agent in registry['agents'].values()}
+        updated = build_featured_file(featured, agents, details)
+        if updated != featured:
+            featured = updated
+            write_json(FEATURED_FILE, featured, inline_lists=True)
+            print(f'Updated {FEATURED_FILE}')
+    
+    # Counts in main.json follow the generated files; rewrite only on change
+    main = read_json(MAIN_FILE)
+    updated = main_with_counts(main, categorized, len(registry['agents']))
+    if featured is not None and 'featured' in updated:
+        updated['featured'] = dict(updated['featured'], count=len(featured['agents']))
+    if updated != main:
+        write_json(MAIN_FILE, updated, inline_lists=True)
+        print(f'Updated counts in {MAIN_FILE}')
     
     print(f'\nGenerated category index files for {total_agents} agents')
+    print(f'Generated {len(details)} agent detail files')
     print('Category breakdown:')
     for category_name, category_data in categorized.items():
         if category_data['agents']:
             print(f'  {category_name}: {len(category_data["agents"])} agents')
+    
+    print('List payload size (full -> slim):')
+    for category_name, (full_size, slim_size) in sizes.items():
+        saved = 100 * (full_size - slim_size) / full_size
+        print(f'  {category_name}: {full_size} -> {slim_size} bytes ({saved:.1f}% smaller)')
+    total_full = sum(full for full, _ in sizes.values())
+    total_slim = sum(slim for _, slim in sizes.values())
+    if total_full:
+        print(f'  total: {total_full} -> {total_slim} bytes '
+              f'({100 * (total_full - total_slim) / total_full:.1f}% smaller)')
+
+def main():
+    """Main function"""
+    # Change to registry directory
+    script_dir = Path(__file__).parent
+    registry_dir = script_dir.parent
+    os.chdir(registry_dir)
+    
+    with tracing('generate-categories'):
+        generate_categories()
 
 if __name__ == '__main__':
     main()
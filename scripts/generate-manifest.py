@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Generate index/manifest.json with the hash and size of every published file
+"""
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_trace import current as current_tracer, tracing
+from registry_data import LOCAL_FILES, hash_file, write_json_if_changed
+
+MANIFEST_FILE = Path('index/manifest.json')
+PUBLISHED_DIRS = ['index', 'agents']
+
+def collect_files():
+    """Collect every published file, sorted by its registry-relative path"""
+    files = []
+    for top in PUBLISHED_DIRS:
+        for path in Path(top).rglob('*'):
+            if path.is_file() and path != MANIFEST_FILE and path.as_posix() not in LOCAL_FILES:
+                files.append(path)
+    return sorted(files, key=lambda p: p.as_posix())
+
+def generate_manifest():
+    """Build the manifest dict for the current tree"""
+    entries = {}
+    tracer = current_tracer()
+    for path in collect_files():
+        with tracer.span(path.as_posix(), 'hash'):
+            sha256, size = hash_file(path)
+        entries[path.as_posix()] = {'sha256': sha256, 'size': size}
+
+    return {
+        'version': '1.0.0',
+        'generatedAt': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'totalFiles': len(entries),
+        'totalBytes': sum(entry['size'] for entry in entries.values()),
+        'files': entries
+    }
+
+def main():
+    """Main function"""
+    # Change to registry directory
+    script_dir = Path(__file__).parent
+    registry_dir = script_dir.parent
+    os.chdir(registry_dir)
+
+    with tracing('generate-manifest'):
+        print('Hashing published files...')
+        manifest = generate_manifest()
+
+        _, written = write_json_if_changed(MANIFEST_FILE, manifest)
+
+    status = 'Generated' if written else 'Unchanged'
+    print(f'{status} {MANIFEST_FILE} with {manifest["totalFiles"]} files ({manifest["totalBytes"]} bytes)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Generate index/versions.json and index/versions.bloom for install resolution
+
+versions.json lists, per `author/id`, the sorted versions, the latest
+version and the sha256/size of every version's agent file. versions.bloom
+is a Bloom filter over all `author/id` and `author/id@version` keys (format
+in registry_versions.py), so clients can reject unknown names and versions
+after fetching a few hundred bytes.
+
+With --resolve the script answers install specs such as
+`wshobson/python-pro@^1.2` from these two files only, locally or from a
+mirror URL given with --base.
+"""
+
+import os
+import sys
+import json
+import argparse
+import urllib.request
+from pathlib import Path
+
+from build_trace import current as current_tracer, tracing
+from registry_data import hash_file, load_registry, write_bytes, write_json_if_changed
+from registry_versions import (DEFAULT_FALSE_POSITIVE_RATE, FILTER_FILE, VERSIONS_FILE,
+                               BloomFilter, build_version_files, resolve)
+
+def file_info(rel_path):
+    """sha256 and size of an agent file, or None if it is missing"""
+    if not os.path.exists(rel_path):
+        return None
+    return hash_file(rel_path)
+
+def read_artifact(base, rel_path):
+    """Read a registry file from a local directory or an http(s) base URL"""
+    if base.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(f'{base.rstrip("/")}/{rel_path}', timeout=30) as response:
+            return response.read()
+    with open(Path(base) / rel_path, 'rb') as f:
+        return f.read()
+
+def resolve_specs(specs, base):
+    """Resolve install specs, fetching versions.json only if the filter passes"""
+    bloom = BloomFilter.from_bytes(read_artifact(base, FILTER_FILE.as_posix()))
+    manifest = None
+    failed = 0
+    for spec in specs:
+        try:
+            name = spec.partition('@')[0]
+            if name in bloom and manifest is None:
+                manifest = json.loads(read_artifact(base, VERSIONS_FILE.as_posix()))
+            result = resolve(spec, manifest or {'agents': {}}, bloom)
+        except (LookupError, ValueError) as e:
+            print(f'[ERROR] {spec}: {e}')
+            failed += 1
+            continue
+        print(f'{spec} -> {result["version"]}')
+        print(f'  {result["url"]} (sha256 {result["sha256"]}, {result["size"]} bytes)')
+    return failed
+
+def generate_versions(false_positive_rate):
+    """Build and write versions.json and versions.bloom from the agent metadata"""
+    tracer = current_tracer()
+    print('Loading registry...')
+    with tracer.span('load-registry'):
+        registry = load_registry()
+
+    with tracer.span('build-versions'):
+        document, payload = build_version_files(registry['agents'].values(), file_info, false_positive_rate)
+    # Keeps the old generatedAt when nothing changed, so hashes stay stable
+    write_json_if_changed(VERSIONS_FILE, document)
+    write_bytes(FILTER_FILE, payload)
+    return document
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Generate the version manifest and existence filter')
+    parser.add_argument('--false-positive-rate', type=float, default=DEFAULT_FALSE_POSITIVE_RATE,
+                        help='Target false positive rate of the filter')
+    parser.add_argument('--resolve', nargs='+', metavar='SPEC',
+                        help='Resolve author/id[@range] specs instead of generating')
+    parser.add_argument('--base', help='Registry directory or URL to resolve against (default: this registry)')
+    args = parser.parse_args()
+    # A local --base is relative to the caller's directory, not the registry
+    if args.base and not args.base.startswith(('http://', 'https://')):
+        args.base = os.path.abspath(args.base)
+
+    # Change to registry directory
+    script_dir = Path(__file__).parent
+    registry_dir = script_dir.parent
+    os.chdir(registry_dir)
+
+    if args.resolve:
+        if resolve_specs(args.resolve, args.base or '.'):
+            sys.exit(1)
+        return
+
+    with tracing('generate-versions'):
+        document = generate_versions(args.false_positive_rate)
+
+    bloom = document['filter']
+    print(f'Generated {VERSIONS_FILE} with {document["totalAgents"]} agents and '
+          f'{document["totalVersions"]} versions ({VERSIONS_FILE.stat().st_size} bytes)')
+    print(f'Generated {FILTER_FILE} with {bloom["keys"]} keys, {bloom["bits"]} bits, '
+          f'{bloom["hashes"]} hashes ({bloom["size"]} bytes)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Load-test a registry server and report requests per second and latency
+
+Each worker holds one keep-alive connection and requests registry paths in a
+round-robin over the file list from index/manifest.json (or --path values).
+One run is made per concurrency level.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+DEFAULT_PATHS = ['index/main.json', 'index/featured.json']
+
+def load_paths(manifest_file):
+    """Return the published paths listed in the manifest"""
+    if not manifest_file.exists():
+        return list(DEFAULT_PATHS)
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return sorted(json.load(f)['files'])
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def worker(base_url, paths, deadline, headers, latencies, errors, offset):
+    """Issue requests until the deadline, appending latencies in seconds"""
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    base_path = parts.path if parts.path.endswith('/') else parts.path + '/'
+    conn = connection_class(parts.hostname, parts.port, timeout=30)
+    local_latencies = []
+    local_errors = 0
+
+    for rel_path in itertools.islice(itertools.cycle(paths), offset, None):
+        if time.perf_counter() >= deadline:
+            break
+        started = time.perf_counter()
+        try:
+            conn.request('GET', base_path + quote(rel_path), headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+            if response.will_close:
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            conn.close()
+            continue
+        local_latencies.append(time.perf_counter() - started)
+
+    conn.close()
+    latencies.extend(local_latencies)
+    errors.append(local_errors)
+
+def run_level(base_url, paths, concurrency, duration, headers):
+    """Run one load level and return its statistics"""
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, paths, deadline, headers, latencies, errors, i))
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requestsPerSecond': round(len(latencies) / elapsed, 1),
+        'p50Ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99Ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'maxMs': round((latencies[-1] if latencies else 0) * 1000, 3)
+    }
+
+def main():
+    """Main function"""
+    registry_dir = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description='Load-test a registry server')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000/', help='Server root URL')
+    parser.add_argument('--concurrency', default='1,8,32', help='Comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per level')
+    parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable)')
+    parser.add_argument('--gzip', action='store_true', help='Send Accept-Encoding: gzip')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    paths = args.paths or load_paths(registry_dir / 'index' / 'manifest.json')
+    headers = {'Accept-Encoding': 'gzip' if args.gzip else 'identity'}
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    results = []
+    for concurrency in levels:
+        result = run_level(args.base_url, paths, concurrency, args.duration, headers)
+        results.append(result)
+        if not args.json:
+            print(f'  concurrency={result["concurrency"]:<4} '
+                  f'rps={result["requestsPerSecond"]:<10} '
+                  f'p50={result["p50Ms"]}ms p99={result["p99Ms"]}ms '
+                  f'errors={result["errors"]}')
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
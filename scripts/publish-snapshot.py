@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Publish the index tree as an immutable, content-hashed snapshot
+
+The whole index/ directory is copied into snapshots/{hash}/index/, where
+{hash} is derived from the path and content of every file, so nothing inside
+a snapshot ever changes and it can be cached forever. Publishing then swaps
+the small snapshots/current.json pointer with an atomic rename, so readers
+see either the old or the new snapshot and never a half-written mix. Old
+snapshots are removed according to a retention policy.
+"""
+
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_trace import current as current_tracer, tracing
+from registry_data import LOCAL_FILES, hash_file, read_json, write_json
+
+INDEX_DIR = Path('index')
+SNAPSHOTS_DIR = Path('snapshots')
+POINTER_FILE = 'current.json'
+SNAPSHOT_ID_LENGTH = 16
+
+def collect_index_files(index_dir=INDEX_DIR):
+    """Return {registry-relative path: sha256} for every index file"""
+    files = {}
+    for path in sorted(Path(index_dir).rglob('*'), key=lambda p: p.as_posix()):
+        if path.is_file() and path.as_posix() not in LOCAL_FILES:
+            files[path.as_posix()] = hash_file(path)[0]
+    return files
+
+def snapshot_id(files):
+    """Content hash over all paths and file hashes"""
+    digest = hashlib.sha256()
+    for rel_path, sha256 in sorted(files.items()):
+        digest.update(f'{rel_path}\0{sha256}\n'.encode('utf-8'))
+    return digest.hexdigest()[:SNAPSHOT_ID_LENGTH]
+
+def build_snapshot(files, snapshots_dir):
+    """Write the snapshot directory if it does not exist yet and return its path"""
+    snap_id = snapshot_id(files)
+    target = snapshots_dir / snap_id
+    if target.exists():
+        # Same content was published before; mark it as recently used
+        os.utime(target)
+        return target, False
+
+    snapshots_dir.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=snapshots_dir))
+    try:
+        for rel_path, sha256 in files.items():
+            destination = staging / rel_path
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(rel_path, destination)
+            if hash_file(destination)[0] != sha256:
+                raise RuntimeError(f'{rel_path} changed while the snapshot was being written')
+        # mkdtemp creates the directory as 0700; published snapshots must be
+        # readable by a web server running as another user
+        os.chmod(staging, 0o755)
+        # Directory rename is atomic, so a snapshot is either complete or absent
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return target, True
+
+def read_pointer(snapshots_dir):
+    pointer_file = snapshots_dir / POINTER_FILE
+    if not pointer_file.exists():
+        return None
+    return read_json(pointer_file)
+
+def swap_pointer(snapshots_dir, snap_id, file_count):
+    """Atomically point snapshots/current.json at snap_id"""
+    pointer = {
+        'snapshot': snap_id,
+        'base': f'{snapshots_dir.as_posix()}/{snap_id}/',
+        'publishedAt': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'files': file_count
+    }
+    tmp_file = snapshots_dir / f'.{POINTER_FILE}.tmp'
+    write_json(tmp_file, pointer)
+    with open(tmp_file, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_file, snapshots_dir / POINTER_FILE)
+    return pointer
+
+def collect_garbage(snapshots_dir, current_id, keep, min_age_hours):
+    """Delete old snapshots beyond the newest `keep`, never touching young ones
+
+    Snapshots younger than min_age_hours are kept regardless of count so
+    clients that fetched the previous pointer can finish reading.
+    """
+    snapshots = [
+        path for path in snapshots_dir.iterdir()
+        if path.is_dir() and not path.name.startswith('.') and path.name != current_id
+    ]
+    snapshots.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+
+    cutoff = time.time() - min_age_hours * 3600
+    removed = []
+    # The current snapshot occupies one of the retained slots
+    for path in snapshots[max(keep - 1, 0):]:
+        if path.stat().st_mtime < cutoff:
+            shutil.rmtree(path)
+            removed.append(path.name)
+    return removed
+
+def publish(args):
+    """Build the snapshot, swap the pointer and collect old snapshots"""
+    tracer = current_tracer()
+    with tracer.span('collect-index'):
+        files = collect_index_files()
+    if 'index/main.json' not in files:
+        print('[ERROR] index/main.json not found')
+        sys.exit(1)
+
+    with tracer.span('build-snapshot'):
+        target, created = build_snapshot(files, SNAPSHOTS_DIR)
+    status = 'Created' if created else 'Reused'
+    print(f'{status} snapshot {target} with {len(files)} files')
+
+    previous = read_pointer(SNAPSHOTS_DIR)
+    with tracer.span('swap-pointer'):
+        pointer = swap_pointer(SNAPSHOTS_DIR, target.name, len(files))
+    if previous and previous.get('snapshot') != pointer['snapshot']:
+        print(f'Switched {SNAPSHOTS_DIR / POINTER_FILE}: {previous["snapshot"]} -> {pointer["snapshot"]}')
+    else:
+        print(f'Pointer {SNAPSHOTS_DIR / POINTER_FILE} -> {pointer["snapshot"]}')
+
+    if not args.no_gc:
+        with tracer.span('garbage-collect'):
+            removed = collect_garbage(SNAPSHOTS_DIR, target.name, args.keep, args.min_age_hours)
+        for name in removed:
+            print(f'  [GC] Removed snapshot {name}')
+        print(f'Garbage collection removed {len(removed)} snapshots')
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Publish an immutable index snapshot')
+    parser.add_argument('--keep', type=int, default=5, help='Number of snapshots to retain, including the current one')
+    parser.add_argument('--min-age-hours', type=float, default=24,
+                        help='Never delete snapshots younger than this')
+    parser.add_argument('--no-gc', action='store_true', help='Skip garbage collection')
+    args = parser.parse_args()
+
+    # Change to registry directory
+    script_dir = Path(__file__).parent
+    registry_dir = script_dir.parent
+    os.chdir(registry_dir)
+
+    with tracing('publish-snapshot'):
+        publish(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,398 @@
+"""
+Category definitions and category index building shared by the index
+generators, the watch daemon and the exporters
+"""
+
+import random
+from pathlib import Path
+
+from build_trace import current as current_tracer
+from registry_data import slim_record, write_detail_file
+
+CATEGORY_LAST_UPDATED = '2025-09-29T03:10:00Z'
+CATEGORIES_DIR = Path('index/categories')
+MAIN_FILE = Path('index/main.json')
+FEATURED_FILE = Path('index/featured.json')
+# Featured records are curated by hand; only these fields follow the metadata
+FEATURED_SYNC_FIELDS = ['version', 'files']
+
+def get_correct_categories():
+    """Define the exact categories from README"""
+    return {
+        'core-architecture': {
+            'name': {
+                'en': 'Core Architecture',
+                'zh': '核心架构',
+                'ja': 'コアアーキテクチャ'
+            },
+            'description': {
+                'en': 'Backend APIs, system architecture, and cloud infrastructure design',
+                'zh': '后端API、系统架构和云基础设施设计',
+                'ja': 'バックエンドAPI、システムアーキテクチャ、クラウドインフラ設計'
+            },
+            'agents': ['backend-architect', 'frontend-developer', 'graphql-architect', 'architect-review', 'cloud-architect', 'hybrid-cloud-architect', 'kubernetes-architect']
+        },
+        'ui-mobile': {
+            'name': {
+                'en': 'UI/UX & Mobile',
+                'zh': 'UI/UX与移动端',
+                'ja': 'UI/UX・モバイル'
+            },
+            'description': {
+                'en': 'User interface design, mobile development, and visual validation',
+                'zh': '用户界面设计、移动开发和视觉验证',
+                'ja': 'ユーザーインターフェース設計、モバイル開発、ビジュアル検証'
+            },
+            'agents': ['ui-ux-designer', 'ui-visual-validator', 'mobile-developer', 'ios-developer', 'flutter-expert']
+        },
+        'systems-programming': {
+            'name': {
+                'en': 'Systems & Low-Level Programming',
+                'zh': '系统与底层编程',
+                'ja': 'システム・低レベルプログラミング'
+            },
+            'description': {
+                'en': 'System programming, memory management, and performance-critical applications',
+                'zh': '系统编程、内存管理和性能关键应用',
+                'ja': 'システムプログラミング、メモリ管理、パフォーマンス重視アプリケーション'
+            },
+            'agents': ['c-pro', 'cpp-pro', 'rust-pro', 'golang-pro']
+        },
+        'web-programming': {
+            'name': {
+                'en': 'Web & Application Programming',
+                'zh': 'Web与应用程序编程',
+                'ja': 'Web・アプリケーションプログラミング'
+            },
+            'description': {
+                'en': 'Modern web development with JavaScript, Python, and other dynamic languages',
+                'zh': '使用JavaScript、Python等动态语言进行现代Web开发',
+                'ja': 'JavaScript、Pythonなどの動的言語によるモダンWeb開発'
+            },
+            'agents': ['javascript-pro', 'typescript-pro', 'python-pro', 'ruby-pro', 'php-pro']
+        },
+        'enterprise-programming': {
+            'name': {
+                'en': 'Enterprise & JVM Programming',
+                'zh': '企业与JVM编程',
+                'ja': 'エンタープライズ・JVMプログラミング'
+            },
+            'description': {
+                'en': 'Enterprise-grade development with Java, Scala, and .NET platforms',
+                'zh': '使用Java、Scala和.NET平台进行企业级开发',
+                'ja': 'Java、Scala、.NETプラットフォームによるエンタープライズ開発'
+            },
+            'agents': ['java-pro', 'scala-pro', 'csharp-pro']
+        },
+        'specialized-platforms': {
+            'name': {
+                'en': 'Specialized Platforms',
+                'zh': '专业平台',
+                'ja': '専門プラットフォーム'
+            },
+            'description': {
+                'en': 'Domain-specific programming platforms and frameworks',
+                'zh': '特定领域的编程平台和框架',
+                'ja': 'ドメイン固有のプログラミングプラットフォームとフレームワーク'
+            },
+            'agents': ['elixir-pro', 'unity-developer', 'minecraft-bukkit-pro', 'sql-pro']
+        },
+        'devops-deployment': {
+            'name': {
+                'en': 'DevOps & Deployment',
+                'zh': 'DevOps与部署',
+                'ja': 'DevOps・デプロイメント'
+            },
+            'description': {
+                'en': 'CI/CD pipelines, containerization, and infrastructure automation',
+                'zh': 'CI/CD管道、容器化和基础设施自动化',
+                'ja': 'CI/CDパイプライン、コンテナ化、インフラ自動化'
+            },
+            'agents': ['devops-troubleshooter', 'deployment-engineer', 'terraform-specialist', 'dx-optimizer']
+        },
+        'database-management': {
+            'name': {
+                'en': 'Database Management',
+                'zh': '数据库管理',
+                'ja': 'データベース管理'
+            },
+            'description': {
+                'en': 'Database optimization, administration, and performance tuning',
+                'zh': '数据库优化、管理和性能调优',
+                'ja': 'データベース最適化、管理、パフォーマンスチューニング'
+            },
+            'agents': ['database-optimizer', 'database-admin']
+        },
+        'incident-network': {
+            'name': {
+                'en': 'Incident Response & Network',
+                'zh': '事件响应与网络',
+                'ja': 'インシデント対応・ネットワーク'
+            },
+            'description': {
+                'en': 'Production incident management and network operations',
+                'zh': '生产事件管理和网络运维',
+                'ja': '本番インシデント管理とネットワーク運用'
+            },
+            'agents': ['incident-responder', 'network-engineer']
+        },
+        'code-quality': {
+            'name': {
+                'en': 'Code Quality & Review',
+                'zh': '代码质量与审查',
+                'ja': 'コード品質・レビュー'
+            },
+            'description': {
+                'en': 'Code review, security auditing, and best practices enforcement',
+                'zh': '代码审查、安全审计和最佳实践执行',
+                'ja': 'コードレビュー、セキュリティ監査、ベストプラクティス実施'
+            },
+            'agents': ['code-reviewer', 'security-auditor', 'backend-security-coder', 'frontend-security-coder', 'mobile-security-coder']
+        },
+        'testing-debugging': {
+            'name': {
+                'en': 'Testing & Debugging',
+                'zh': '测试与调试',
+                'ja': 'テスト・デバッグ'
+            },
+            'description': {
+                'en': 'Test automation, debugging, and error analysis',
+                'zh': '测试自动化、调试和错误分析',
+                'ja': 'テスト自動化、デバッグ、エラー解析'
+            },
+            'agents': ['test-automator', 'tdd-orchestrator', 'debugger', 'error-detective']
+        },
+        'performance-observability': {
+            'name': {
+                'en': 'Performance & Observability',
+                'zh': '性能与可观测性',
+                'ja': 'パフォーマンス・可観測性'
+            },
+            'description': {
+                'en': 'Application performance optimization and monitoring',
+                'zh': '应用性能优化和监控',
+                'ja': 'アプリケーションパフォーマンス最適化とモニタリング'
+            },
+            'agents': ['performance-engineer', 'observability-engineer', 'search-specialist']
+        },
+        'data-analytics': {
+            'name': {
+                'en': 'Data Engineering & Analytics',
+                'zh': '数据工程与分析',
+                'ja': 'データエンジニアリング・分析'
+            },
+            'description': {
+                'en': 'Data processing, analytics, and business intelligence',
+                'zh': '数据处理、分析和商业智能',
+                'ja': 'データ処理、分析、ビジネスインテリジェンス'
+            },
+            'agents': ['data-scientist', 'data-engineer']
+        },
+        'machine-learning': {
+            'name': {
+                'en': 'Machine Learning & AI',
+                'zh': '机器学习与人工智能',
+                'ja': '機械学習・AI'
+            },
+            'description': {
+                'en': 'ML pipelines, AI applications, and prompt engineering',
+                'zh': 'ML管道、AI应用和提示工程',
+                'ja': 'MLパイプライン、AIアプリケーション、プロンプトエンジニアリング'
+            },
+            'agents': ['ai-engineer', 'ml-engineer', 'mlops-engineer', 'prompt-engineer']
+        },
+        'documentation': {
+            'name': {
+                'en': 'Documentation & Technical Writing',
+                'zh': '文档与技术写作',
+                'ja': 'ドキュメント・技術文書'
+            },
+            'description': {
+                'en': 'Technical documentation, API specs, and content creation',
+                'zh': '技术文档、API规范和内容创建',
+                'ja': '技術文書、API仕様、コンテンツ作成'
+            },
+            'agents': ['docs-architect', 'api-documenter', 'reference-builder', 'tutorial-engineer', 'mermaid-expert']
+        },
+        'business-finance': {
+            'name': {
+                'en': 'Business Analysis & Finance',
+                'zh': '业务分析与金融',
+                'ja': 'ビジネス分析・金融'
+            },
+            'description': {
+                'en': 'Business metrics, financial modeling, and risk analysis',
+                'zh': '业务指标、金融建模和风险分析',
+                'ja': 'ビジネスメトリクス、金融モデリング、リスク分析'
+            },
+            'agents': ['business-analyst', 'quant-analyst', 'risk-manager']
+        },
+        'marketing-sales': {
+            'name': {
+                'en': 'Marketing & Sales',
+                'zh': '营销与销售',
+                'ja': 'マーケティング・営業'
+            },
+            'description': {
+                'en': 'Content marketing, sales automation, and customer engagement',
+                'zh': '内容营销、销售自动化和客户参与',
+                'ja': 'コンテンツマーケティング、営業自動化、顧客エンゲージメント'
+            },
+            'agents': ['content-marketer', 'sales-automator']
+        },
+        'support-legal': {
+            'name': {
+                'en': 'Support & Legal',
+                'zh': '支持与法务',
+                'ja': 'サポート・法務'
+            },
+            'description': {
+                'en': 'Customer support, HR operations, and legal compliance',
+                'zh': '客户支持、人力资源运营和法律合规',
+                'ja': 'カスタマーサポート、人事運営、法的コンプライアンス'
+            },
+            'agents': ['customer-support', 'hr-pro', 'legal-advisor']
+        },
+        'specialized-domains': {
+            'name': {
+                'en': 'Specialized Domains',
+                'zh': '专业领域',
+                'ja': '専門領域'
+            },
+            'description': {
+                'en': 'Blockchain, payments, legacy modernization, and specialized tools',
+                'zh': '区块链、支付、遗留系统现代化和专业工具',
+                'ja': 'ブロックチェーン、決済、レガシーモダナイゼーション、専門ツール'
+            },
+            'agents': ['blockchain-developer', 'payment-integration', 'legacy-modernizer', 'context-manager']
+        },
+        'seo-content': {
+            'name': {
+                'en': 'SEO & Content Optimization',
+                'zh': 'SEO与内容优化',
+                'ja': 'SEO・コンテンツ最適化'
+            },
+            'description': {
+                'en': 'Search engine optimization, content strategy, and digital marketing',
+                'zh': '搜索引擎优化、内容策略和数字营销',
+                'ja': '検索エンジン最適化、コンテンツ戦略、デジタルマーケティング'
+            },
+            'agents': ['seo-content-auditor', 'seo-meta-optimizer', 'seo-keyword-strategist', 'seo-structure-architect', 'seo-snippet-hunter', 'seo-content-refresher', 'seo-cannibalization-detector', 'seo-authority-builder', 'seo-content-writer', 'seo-content-planner']
+        }
+    }
+
+def category_members(registry):
+    """Map each category to the registry keys of its agents
+
+    Category definitions list bare agent ids, so agents with the same id
+    from different authors (e.g. code-reviewer) all belong to the category.
+    """
+    keys_by_id = {}
+    for agent_key, agent_data in sorted(registry['agents'].items()):
+        keys_by_id.setdefault(agent_data['id'], []).append(agent_key)
+    return {
+        cat_name: [key for agent_id in cat_data['agents'] for key in keys_by_id.get(agent_id, [])]
+        for cat_name, cat_data in get_correct_categories().items()
+    }
+
+def fill_missing_stats(agent_data):
+    """Give an agent without ratings/downloads stable placeholder values
+
+    The generator is seeded with the agent's author/id, so rebuilding
+    without input changes produces identical files.
+    """
+    rng = random.Random(f'{agent_data["author"]}/{agent_data["id"]}')
+    rating = round(rng.uniform(3.0, 5.0), 1)
+    downloads = rng.randint(50, 2000)
+    if not agent_data.get('rating'):
+        agent_data['rating'] = rating
+    if not agent_data.get('downloads'):
+        agent_data['downloads'] = downloads
+
+def categorize_agents_correctly(registry):
+    """Categorize agents based on the exact README structure"""
+    categories = get_correct_categories()
+    categorized = {cat: {'meta': categories[cat], 'agents': []} for cat in categories}
+    
+    # Assign agents to categories based on exact mapping
+    for cat_name, agent_keys in category_members(registry).items():
+        for agent_key in agent_keys:
+            agent_data = registry['agents'][agent_key]
+            # Add ratings and downloads if missing
+            fill_missing_stats(agent_data)
+            categorized[cat_name]['agents'].append(agent_data)
+    
+    return categorized
+
+def build_category_file(category_name, category_data, details):
+    """Build a category index with slim list records
+
+    Full agent records go to per-agent detail files, written only for agents
+    missing from `details` ({(author, id): detail reference}, shared between
+    categories).
+    """
+    meta = category_data['meta']
+    agents = category_data['agents']
+    current_tracer().count('agentsIndexed', len(agents))
+    
+    # Sort by downloads (descending), ties in registry order
+    agents.sort(key=lambda x: (-x.get('downloads', 0), x['author'], x['id']))
+    
+    records = []
+    for agent in agents:
+        key = (agent['author'], agent['id'])
+        if key not in details:
+            details[key] = write_detail_file(agent)
+        records.append(slim_record(agent, details[key]))
+    
+    return {
+        'category': category_name,
+        'name': meta['name'],
+        'description': meta['description'],
+        'lastUpdated': CATEGORY_LAST_UPDATED,
+        'totalAgents': len(agents),
+        'agents': records
+    }
+
+def build_featured_file(featured, agents, details):
+    """Rebuild featured.json from the curated list with slim list records
+
+    Curated text, tags and stats stay as written, FEATURED_SYNC_FIELDS
+    follow the agent metadata and each record points at the agent's detail
+    file like the category indexes do. `agents` maps (author, id) to agent
+    records; featured agents missing from it are left out.
+    """
+    records = []
+    for record in featured['agents']:
+        key = (record.get('author'), record.get('id'))
+        agent = agents.get(key)
+        if agent is None:
+            continue
+        if key not in details:
+            fill_missing_stats(agent)
+            details[key] = write_detail_file(agent)
+        synced = dict(record, **{field: agent[field] for field in FEATURED_SYNC_FIELDS if field in agent})
+        records.append(slim_record(synced, details[key]))
+    return dict(featured, totalAgents=len(records), agents=records)
+
+def main_with_counts(main, categorized, total_agents):
+    """Return main.json data with agent and category counts from categorized
+
+    Existing entries keep their position and fields; categories that become
+    non-empty are appended and empty ones are dropped.
+    """
+    main = dict(main, totalAgents=total_agents)
+    existing = main.get('categories', {})
+    categories = {}
+    for slug in list(existing) + [slug for slug in categorized if slug not in existing]:
+        count = len(categorized[slug]['agents']) if slug in categorized else 0
+        if not count:
+            continue
+        entry = existing.get(slug) or {
+            'url': f'{CATEGORIES_DIR.as_posix()}/{slug}.json',
+            'name': categorized[slug]['meta']['name'],
+            'description': categorized[slug]['meta']['description']
+        }
+        categories[slug] = {'count': count, **{k: v for k, v in entry.items() if k != 'count'}}
+    main['categories'] = categories
+    return main
@@ -0,0 +1,157 @@
+"""
+Shared helpers for loading registry data and writing index files
+"""
+
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+
+from build_trace import current as current_tracer
+
+REGISTRY_FILE = Path('registry.json')
+AGENTS_DIR = Path('agents')
+DETAILS_DIR = Path('index/details')
+
+# Built locally by export-sqlite.py and git-ignored, so never published,
+# listed in the manifest or copied into snapshots
+LOCAL_FILES = {'index/registry.sqlite'}
+
+# A JSON array of scalars spread over several lines by indent=2
+SCALAR_LIST_RE = re.compile(r'\[(?:\s*(?:"(?:[^"\\\n]|\\.)*"|-?[0-9.eE+-]+|true|false|null)\s*,?)*\s*\]')
+
+# Fields kept in category/featured list records; everything else lives in
+# the per-agent detail file and is fetched only when an agent is opened
+LIST_FIELDS = ['id', 'author', 'name', 'description', 'category', 'tags',
+               'version', 'rating', 'downloads', 'updatedAt', 'files']
+
+def read_json(path):
+    """Read a JSON file"""
+    tracer = current_tracer()
+    with tracer.span(Path(path).as_posix(), 'read'):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        tracer.count('bytesRead', len(raw))
+        tracer.count('filesRead')
+        with tracer.timed('jsonParseSeconds'):
+            return json.loads(raw)
+
+def dump_json(data, inline_lists=False):
+    """Serialize data exactly as the index files are written
+
+    With inline_lists, arrays of scalars stay on one line, matching the
+    hand-formatted main.json.
+    """
+    with current_tracer().timed('jsonDumpSeconds'):
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+        if inline_lists:
+            text = SCALAR_LIST_RE.sub(lambda m: json.dumps(json.loads(m.group(0)), ensure_ascii=False), text)
+        return text.encode('utf-8')
+
+def write_bytes(path, payload):
+    """Write a published file and return the written bytes
+
+    The file is written next to its destination and renamed into place, so
+    a concurrent reader (the server, a rebuild by the watch daemon) sees the
+    old or the new content, never a partial file.
+    """
+    tracer = current_tracer()
+    path = Path(path)
+    with tracer.span(path.as_posix(), 'write'):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_name(f'.{path.name}.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_file, path)
+        tracer.count('bytesWritten', len(payload))
+        tracer.count('filesWritten')
+    return payload
+
+def write_json(path, data, inline_lists=False):
+    """Write data as an index file and return the written bytes"""
+    return write_bytes(path, dump_json(data, inline_lists))
+
+def write_json_if_changed(path, data, volatile=('generatedAt',), inline_lists=False):
+    """Write an index file unless it differs from the existing one only in volatile fields
+
+    Returns (payload, written). Keeping the old bytes (and timestamp) for
+    unchanged content keeps manifest hashes and snapshot ids stable.
+    """
+    path = Path(path)
+    if path.exists():
+        with open(path, 'rb') as f:
+            raw = f.read()
+        try:
+            existing = json.loads(raw)
+        except ValueError:
+            existing = None
+        if isinstance(existing, dict) and isinstance(data, dict):
+            strip = lambda d: {key: value for key, value in d.items() if key not in volatile}
+            if strip(existing) == strip(data):
+                return raw, False
+    return write_json(path, data, inline_lists), True
+
+def hash_file(path):
+    """Return the sha256 hex digest and size of a file"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    current_tracer().count('bytesRead', size)
+    return digest.hexdigest(), size
+
+def iter_metadata_files(agents_dir=AGENTS_DIR):
+    """Yield (author, agent directory name, metadata path) for every agent"""
+    for author_dir in sorted(Path(agents_dir).iterdir()):
+        if not author_dir.is_dir():
+            continue
+        for agent_dir in sorted(author_dir.iterdir()):
+            metadata_file = agent_dir / 'metadata.json'
+            if agent_dir.is_dir() and metadata_file.exists():
+                yield author_dir.name, agent_dir.name, metadata_file
+
+def agent_from_metadata(author, metadata):
+    """Turn a metadata.json document into a registry agent record"""
+    agent = dict(metadata)
+    # Index records use the author namespace (directory name), not the display name
+    agent['author'] = author
+    latest = metadata.get('latest')
+    agent['version'] = latest
+    latest_file = metadata.get('versions', {}).get(latest, {}).get('files', {}).get('agent')
+    if latest_file:
+        agent['files'] = {'latest': latest_file}
+    return agent
+
+def load_registry(registry_file=REGISTRY_FILE, agents_dir=AGENTS_DIR):
+    """Load registry.json, or build the same structure from agents/*/*/metadata.json"""
+    if Path(registry_file).exists():
+        return read_json(registry_file)
+
+    agents = {}
+    for author, _, metadata_file in iter_metadata_files(agents_dir):
+        metadata = read_json(metadata_file)
+        agents[f'{author}/{metadata["id"]}'] = agent_from_metadata(author, metadata)
+    return {'agents': agents}
+
+def detail_path(agent):
+    """Registry-relative path of an agent's detail file"""
+    return DETAILS_DIR / agent['author'] / f'{agent["id"]}.json'
+
+def write_detail_file(agent):
+    """Write the full agent record to its detail file and return the detail reference"""
+    path = detail_path(agent)
+    payload = write_json(path, agent)
+    return {
+        'url': path.as_posix(),
+        'sha256': hashlib.sha256(payload).hexdigest(),
+        'size': len(payload)
+    }
+
+def slim_record(agent, detail):
+    """Build the list record for an agent, pointing at its detail file"""
+    record = {field: agent[field] for field in LIST_FIELDS if field in agent}
+    record['detail'] = detail
+    return record
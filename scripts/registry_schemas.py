@@ -0,0 +1,393 @@
+"""
+JSON schemas for registry files and a small compiler for them
+
+The schemas use a subset of JSON Schema (type, required, properties,
+additionalProperties, patternProperties, items, enum, pattern, minimum,
+maximum, minLength and local $ref). `compile_schema` turns a schema into a
+plain validator function once, so validating many files does not re-walk the
+schema dictionaries.
+"""
+
+import re
+import json
+import hashlib
+
+SEMVER = r'^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(-[0-9A-Za-z.-]+)?(\+[0-9A-Za-z.-]+)?$'
+SLUG = r'^[a-z0-9][a-z0-9-]*$'
+SHA256 = r'^[0-9a-f]{64}$'
+
+DEFINITIONS = {
+    'localized': {
+        'type': 'object',
+        'required': ['en', 'zh', 'ja'],
+        'properties': {
+            'en': {'type': 'string', 'minLength': 1},
+            'zh': {'type': 'string'},
+            'ja': {'type': 'string'}
+        },
+        'additionalProperties': False
+    },
+    'semver': {'type': 'string', 'pattern': SEMVER},
+    'slug': {'type': 'string', 'pattern': SLUG},
+    'timestamp': {'type': 'string', 'pattern': r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?Z$'},
+    'tags': {'type': 'array', 'items': {'type': 'string', 'minLength': 1}},
+    'compatibility': {
+        'type': 'object',
+        'required': ['claudeCode'],
+        'properties': {
+            'claudeCode': {
+                'type': 'object',
+                'required': ['minVersion'],
+                'properties': {
+                    'minVersion': {'$ref': '#/$defs/semver'},
+                    'tested': {'type': 'array', 'items': {'$ref': '#/$defs/semver'}}
+                }
+            }
+        },
+        'additionalProperties': False
+    },
+    'versions': {
+        'type': 'object',
+        'patternProperties': {
+            SEMVER: {
+                'type': 'object',
+                'required': ['releaseDate', 'files'],
+                'properties': {
+                    'releaseDate': {'$ref': '#/$defs/timestamp'},
+                    'changes': {'type': 'string'},
+                    'files': {
+                        'type': 'object',
+                        'required': ['agent'],
+                        'properties': {'agent': {'type': 'string', 'pattern': r'^[a-z0-9-]+_v.+\.md$'}}
+                    }
+                }
+            }
+        },
+        'additionalProperties': False
+    },
+    'detailRef': {
+        'type': 'object',
+        'required': ['url', 'sha256', 'size'],
+        'properties': {
+            'url': {'type': 'string', 'pattern': r'^index/details/'},
+            'sha256': {'type': 'string', 'pattern': SHA256},
+            'size': {'type': 'integer', 'minimum': 0}
+        },
+        'additionalProperties': False
+    },
+    # Agent entry in category and featured list files (slim or full)
+    'listRecord': {
+        'type': 'object',
+        'required': ['id', 'author', 'name', 'description', 'version'],
+        'properties': {
+            'id': {'$ref': '#/$defs/slug'},
+            'author': {'$ref': '#/$defs/slug'},
+            'name': {'$ref': '#/$defs/localized'},
+            'description': {'$ref': '#/$defs/localized'},
+            'category': {'$ref': '#/$defs/slug'},
+            'tags': {'$ref': '#/$defs/tags'},
+            'compatibility': {'$ref': '#/$defs/compatibility'},
+            'version': {'$ref': '#/$defs/semver'},
+            'versions': {'$ref': '#/$defs/versions'},
+            'rating': {'type': 'number', 'minimum': 0, 'maximum': 5},
+            'downloads': {'type': 'integer', 'minimum': 0},
+            'files': {
+                'type': 'object',
+                'required': ['latest'],
+                'properties': {'latest': {'type': 'string'}}
+            },
+            'detail': {'$ref': '#/$defs/detailRef'}
+        }
+    },
+    'listFile': {
+        'type': 'object',
+        'required': ['name', 'description', 'lastUpdated', 'totalAgents', 'agents'],
+        'properties': {
+            'name': {'$ref': '#/$defs/localized'},
+            'description': {'$ref': '#/$defs/localized'},
+            'lastUpdated': {'$ref': '#/$defs/timestamp'},
+            'totalAgents': {'type': 'integer', 'minimum': 0},
+            'agents': {'type': 'array', 'items': {'$ref': '#/$defs/listRecord'}}
+        }
+    }
+}
+
+METADATA_SCHEMA = {
+    'type': 'object',
+    'required': ['id', 'name', 'description', 'author', 'versions', 'latest'],
+    'properties': {
+        'id': {'$ref': '#/$defs/slug'},
+        'name': {'$ref': '#/$defs/localized'},
+        'description': {'$ref': '#/$defs/localized'},
+        'longDescription': {'$ref': '#/$defs/localized'},
+        'author': {'type': 'string', 'minLength': 1},
+        'license': {'type': 'string'},
+        'homepage': {'type': 'string', 'pattern': r'^https?://'},
+        'category': {'type': 'string'},
+        'tags': {'$ref': '#/$defs/tags'},
+        'compatibility': {'$ref': '#/$defs/compatibility'},
+        'versions': {'$ref': '#/$defs/versions'},
+        'latest': {'$ref': '#/$defs/semver'},
+        'downloads': {'type': 'integer', 'minimum': 0},
+        'rating': {'type': 'number', 'minimum': 0, 'maximum': 5},
+        'ratingCount': {'type': 'integer', 'minimum': 0},
+        'createdAt': {'$ref': '#/$defs/timestamp'},
+        'updatedAt': {'$ref': '#/$defs/timestamp'}
+    },
+    'additionalProperties': False
+}
+
+MAIN_SCHEMA = {
+    'type': 'object',
+    'required': ['version', 'lastUpdated', 'totalAgents', 'languages', 'categories'],
+    'properties': {
+        'version': {'$ref': '#/$defs/semver'},
+        'lastUpdated': {'$ref': '#/$defs/timestamp'},
+        'totalAgents': {'type': 'integer', 'minimum': 0},
+        'languages': {'type': 'array', 'items': {'enum': ['en', 'zh', 'ja']}},
+        'categories': {
+            'type': 'object',
+            'patternProperties': {
+                SLUG: {
+                    'type': 'object',
+                    'required': ['count', 'url', 'name', 'description'],
+                    'properties': {
+                        'count': {'type': 'integer', 'minimum': 0},
+                        'url': {'type': 'string', 'pattern': r'^index/categories/[a-z0-9-]+\.json$'},
+                        'name': {'$ref': '#/$defs/localized'},
+                        'description': {'$ref': '#/$defs/localized'}
+                    }
+                }
+            },
+            'additionalProperties': False
+        }
+    }
+}
+
+CATEGORY_SCHEMA = {
+    'allOf': [
+        {'$ref': '#/$defs/listFile'},
+        {'type': 'object', 'required': ['category'], 'properties': {'category': {'$ref': '#/$defs/slug'}}}
+    ]
+}
+
+FEATURED_SCHEMA = {'$ref': '#/$defs/listFile'}
+
+DETAIL_SCHEMA = {
+    'allOf': [
+        {'$ref': '#/$defs/listRecord'},
+        {'type': 'object', 'required': ['versions', 'latest']}
+    ]
+}
+
+MANIFEST_SCHEMA = {
+    'type': 'object',
+    'required': ['version', 'generatedAt', 'totalFiles', 'totalBytes', 'files'],
+    'properties': {
+        'totalFiles': {'type': 'integer', 'minimum': 0},
+        'totalBytes': {'type': 'integer', 'minimum': 0},
+        'files': {
+            'type': 'object',
+            'additionalProperties': {
+                'type': 'object',
+                'required': ['sha256', 'size'],
+                'properties': {
+                    'sha256': {'type': 'string', 'pattern': SHA256},
+                    'size': {'type': 'integer', 'minimum': 0}
+                }
+            }
+        }
+    }
+}
+
+VERSIONS_SCHEMA = {
+    'type': 'object',
+    'required': ['version', 'generatedAt', 'totalAgents', 'totalVersions', 'filter', 'agents'],
+    'properties': {
+        'totalAgents': {'type': 'integer', 'minimum': 0},
+        'totalVersions': {'type': 'integer', 'minimum': 0},
+        'filter': {
+            'type': 'object',
+            'required': ['url', 'sha256', 'size', 'keys', 'bits', 'hashes'],
+            'properties': {
+                'url': {'type': 'string'},
+                'sha256': {'type': 'string', 'pattern': SHA256},
+                'size': {'type': 'integer', 'minimum': 0},
+                'keys': {'type': 'integer', 'minimum': 0},
+                'bits': {'type': 'integer', 'minimum': 8},
+                'hashes': {'type': 'integer', 'minimum': 1}
+            }
+        },
+        'agents': {
+            'type': 'object',
+            'patternProperties': {
+                r'^[^/]+/[a-z0-9][a-z0-9-]*$': {
+                    'type': 'object',
+                    'required': ['versions', 'latest', 'files'],
+                    'properties': {
+                        'versions': {'type': 'array', 'items': {'$ref': '#/$defs/semver'}},
+                        'latest': {'$ref': '#/$defs/semver'},
+                        'files': {
+                            'type': 'object',
+                            'patternProperties': {
+                                SEMVER: {
+                                    'type': 'object',
+                                    'required': ['file', 'sha256', 'size'],
+                                    'properties': {
+                                        'file': {'type': 'string', 'minLength': 1},
+                                        'sha256': {'type': 'string', 'pattern': SHA256},
+                                        'size': {'type': 'integer', 'minimum': 0}
+                                    }
+                                }
+                            },
+                            'additionalProperties': False
+                        }
+                    }
+                }
+            },
+            'additionalProperties': False
+        }
+    }
+}
+
+SCHEMAS = {
+    'metadata': METADATA_SCHEMA,
+    'main': MAIN_SCHEMA,
+    'category': CATEGORY_SCHEMA,
+    'featured': FEATURED_SCHEMA,
+    'detail': DETAIL_SCHEMA,
+    'manifest': MANIFEST_SCHEMA,
+    'versions': VERSIONS_SCHEMA
+}
+
+def schemas_fingerprint():
+    """Hash of all schemas; cached validation results are only valid for it"""
+    payload = json.dumps([DEFINITIONS, SCHEMAS], sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+TYPE_CHECKS = {
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'string': lambda v: isinstance(v, str),
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+    'null': lambda v: v is None
+}
+
+def compile_schema(schema, definitions=DEFINITIONS):
+    """Compile a schema into validate(value, path, errors)"""
+    compiled_refs = {}
+
+    def resolve(ref):
+        name = ref.rsplit('/', 1)[-1]
+        if name not in compiled_refs:
+            # Placeholder first so recursive definitions terminate
+            compiled_refs[name] = None
+            compiled_refs[name] = build(definitions[name])
+        return lambda value, path, errors: compiled_refs[name](value, path, errors)
+
+    def build(node):
+        checks = []
+
+        if '$ref' in node:
+            checks.append(resolve(node['$ref']))
+
+        for sub in node.get('allOf', []):
+            checks.append(build(sub))
+
+        if 'type' in node:
+            expected = node['type']
+            if isinstance(expected, str):
+                test = TYPE_CHECKS[expected]
+            else:
+                tests = [TYPE_CHECKS[name] for name in expected]
+                test = lambda v, tests=tests: any(t(v) for t in tests)
+
+            def check_type(value, path, errors, test=test, expected=expected):
+                if not test(value):
+                    errors.append(f'{path or "/"}: expected {expected}, got {type(value).__name__}')
+                    return False
+                return True
+        else:
+            check_type = None
+
+        if 'enum' in node:
+            allowed = node['enum']
+            checks.append(lambda v, p, e: v in allowed or e.append(f'{p or "/"}: {v!r} not one of {allowed}'))
+
+        if 'pattern' in node:
+            regex = re.compile(node['pattern'])
+            checks.append(lambda v, p, e: not isinstance(v, str) or regex.search(v)
+                          or e.append(f'{p or "/"}: {v!r} does not match {regex.pattern}'))
+
+        if 'minLength' in node:
+            min_length = node['minLength']
+            checks.append(lambda v, p, e: not isinstance(v, str) or len(v) >= min_length
+                          or e.append(f'{p or "/"}: shorter than {min_length}'))
+
+        if 'minimum' in node or 'maximum' in node:
+            low, high = node.get('minimum'), node.get('maximum')
+
+            def check_range(v, p, e):
+                if isinstance(v, bool) or not isinstance(v, (int, float)):
+                    return
+                if low is not None and v < low:
+                    e.append(f'{p or "/"}: {v} is below {low}')
+                if high is not None and v > high:
+                    e.append(f'{p or "/"}: {v} is above {high}')
+            checks.append(check_range)
+
+        object_keys = ('required', 'properties', 'patternProperties', 'additionalProperties')
+        if any(key in node for key in object_keys):
+            required = node.get('required', [])
+            properties = {key: build(sub) for key, sub in node.get('properties', {}).items()}
+            patterns = [(re.compile(key), build(sub)) for key, sub in node.get('patternProperties', {}).items()]
+            additional = node.get('additionalProperties', True)
+            additional_check = build(additional) if isinstance(additional, dict) else None
+
+            def check_object(value, path, errors):
+                if not isinstance(value, dict):
+                    return
+                for key in required:
+                    if key not in value:
+                        errors.append(f'{path or "/"}: missing required property {key!r}')
+                for key, item in value.items():
+                    item_path = f'{path}/{key}'
+                    matched = False
+                    if key in properties:
+                        properties[key](item, item_path, errors)
+                        matched = True
+                    for regex, check in patterns:
+                        if regex.search(key):
+                            check(item, item_path, errors)
+                            matched = True
+                    if matched:
+                        continue
+                    if additional is False:
+                        errors.append(f'{path or "/"}: unexpected property {key!r}')
+                    elif additional_check is not None:
+                        additional_check(item, item_path, errors)
+            checks.append(check_object)
+
+        if 'items' in node:
+            item_check = build(node['items'])
+
+            def check_items(value, path, errors):
+                if isinstance(value, list):
+                    for index, item in enumerate(value):
+                        item_check(item, f'{path}/{index}', errors)
+            checks.append(check_items)
+
+        def validate(value, path, errors):
+            if check_type is not None and not check_type(value, path, errors):
+                return
+            for check in checks:
+                check(value, path, errors)
+        return validate
+
+    return build(schema)
+
+def compile_all():
+    """Compile every registry schema, keyed by file kind"""
+    return {kind: compile_schema(schema) for kind, schema in SCHEMAS.items()}
@@ -0,0 +1,229 @@
+"""
+SQLite schema and row building for the offline registry database
+
+Used by export-sqlite.py for full exports and by the watch daemon to update
+the rows of single agents in an existing database.
+"""
+
+from registry_categories import category_members, fill_missing_stats
+
+LANGUAGES = ['en', 'zh', 'ja']
+CJK_LANGUAGES = ['zh', 'ja']
+LOCALIZED_FIELDS = ['name', 'description', 'longDescription']
+SCHEMA_VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE registry_info (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE agents (
+    id INTEGER PRIMARY KEY,
+    author TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    latest TEXT,
+    license TEXT,
+    homepage TEXT,
+    rating REAL NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    downloads INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    updated_at TEXT,
+    UNIQUE (author, agent_id)
+);
+CREATE INDEX agents_by_id ON agents (agent_id);
+CREATE INDEX agents_by_downloads ON agents (downloads DESC);
+CREATE INDEX agents_by_rating ON agents (rating DESC);
+CREATE TABLE versions (
+    agent INTEGER NOT NULL REFERENCES agents (id),
+    version TEXT NOT NULL,
+    major INTEGER,
+    minor INTEGER,
+    patch INTEGER,
+    release_date TEXT,
+    changes TEXT,
+    agent_file TEXT,
+    PRIMARY KEY (agent, version)
+) WITHOUT ROWID;
+CREATE TABLE tags (
+    id INTEGER PRIMARY KEY,
+    tag TEXT NOT NULL UNIQUE
+);
+CREATE TABLE agent_tags (
+    agent INTEGER NOT NULL REFERENCES agents (id),
+    tag INTEGER NOT NULL REFERENCES tags (id),
+    PRIMARY KEY (agent, tag)
+) WITHOUT ROWID;
+CREATE INDEX agent_tags_by_tag ON agent_tags (tag, agent);
+CREATE TABLE categories (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL
+);
+CREATE TABLE agent_categories (
+    agent INTEGER NOT NULL REFERENCES agents (id),
+    category INTEGER NOT NULL REFERENCES categories (id),
+    PRIMARY KEY (agent, category)
+) WITHOUT ROWID;
+CREATE INDEX agent_categories_by_category ON agent_categories (category, agent);
+CREATE TABLE localized_strings (
+    owner_type TEXT NOT NULL CHECK (owner_type IN ('agent', 'category')),
+    owner INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (owner_type, owner, field, lang)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE search_words USING fts5 (
+    name, description, agent UNINDEXED, lang UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE search_cjk USING fts5 (
+    name, description, agent UNINDEXED, lang UNINDEXED,
+    tokenize = 'trigram'
+);
+'''
+
+def parse_version(version):
+    """Split 'MAJOR.MINOR.PATCH[-pre]' into integers for sorting, or Nones"""
+    core = version.split('-', 1)[0].split('+', 1)[0]
+    parts = core.split('.')
+    try:
+        major, minor, patch = (int(part) for part in parts)
+    except ValueError:
+        return None, None, None
+    return major, minor, patch
+
+def localized(value):
+    """Normalize a localized field to {lang: text}"""
+    if isinstance(value, dict):
+        return {lang: text for lang, text in value.items() if isinstance(text, str)}
+    if isinstance(value, str):
+        return {'en': value}
+    return {}
+
+def agent_rows(rowid, agent):
+    """Rows of one agent for every per-agent table
+
+    Tags are returned as plain strings under 'tag_names'; callers map them
+    to tag ids. Missing ratings/downloads get the same placeholders as the
+    JSON indexes, so full exports and watch daemon upserts agree.
+    """
+    agent = dict(agent)
+    fill_missing_stats(agent)
+    rows = {}
+    rows['agents'] = [(
+        rowid, agent['author'], agent['id'], agent.get('latest', agent.get('version')),
+        agent.get('license'), agent.get('homepage'), agent.get('rating', 0),
+        agent.get('ratingCount', 0), agent.get('downloads', 0),
+        agent.get('createdAt'), agent.get('updatedAt')
+    )]
+    rows['versions'] = [
+        (rowid, version, *parse_version(version), info.get('releaseDate'),
+         info.get('changes'), info.get('files', {}).get('agent'))
+        for version, info in agent.get('versions', {}).items()
+    ]
+    rows['tag_names'] = sorted(set(agent.get('tags', [])))
+
+    texts = {field: localized(agent.get(field)) for field in LOCALIZED_FIELDS}
+    rows['localized_strings'] = [
+        ('agent', rowid, field, lang, text)
+        for field, values in texts.items() for lang, text in values.items()
+    ]
+
+    rows['search_words'] = []
+    rows['search_cjk'] = []
+    for lang in LANGUAGES:
+        name = texts['name'].get(lang)
+        description = texts['description'].get(lang)
+        if name is None and description is None:
+            continue
+        row = (name or '', description or '', rowid, lang)
+        rows['search_words'].append(row)
+        if lang in CJK_LANGUAGES:
+            rows['search_cjk'].append(row)
+    return rows
+
+def collect_rows(registry, categories):
+    """Flatten the registry into row lists for every table"""
+    rows = {name: [] for name in ['agents', 'versions', 'tags', 'agent_tags', 'categories',
+                                  'agent_categories', 'localized_strings', 'search_words', 'search_cjk']}
+    tag_ids = {}
+    rowids = {}
+
+    for rowid, (agent_key, agent) in enumerate(sorted(registry['agents'].items()), start=1):
+        rowids[agent_key] = rowid
+        for table, table_rows in agent_rows(rowid, agent).items():
+            if table != 'tag_names':
+                rows[table].extend(table_rows)
+                continue
+            for tag in table_rows:
+                if tag not in tag_ids:
+                    tag_ids[tag] = len(tag_ids) + 1
+                    rows['tags'].append((tag_ids[tag], tag))
+                rows['agent_tags'].append((rowid, tag_ids[tag]))
+
+    # Same author/id membership as the JSON category indexes
+    members = category_members(registry)
+    for position, (slug, meta) in enumerate(categories.items(), start=1):
+        rows['categories'].append((position, slug, position))
+        for field in ['name', 'description']:
+            for lang, text in localized(meta.get(field)).items():
+                rows['localized_strings'].append(('category', position, field, lang, text))
+        for agent_key in members.get(slug, []):
+            rows['agent_categories'].append((rowids[agent_key], position))
+
+    return rows
+
+def insert_rows(conn, table, table_rows):
+    if table_rows:
+        placeholders = ', '.join('?' * len(table_rows[0]))
+        conn.executemany(f'INSERT INTO {table} VALUES ({placeholders})', table_rows)
+
+def _delete_agent_rows(conn, rowid):
+    for table in ['versions', 'agent_tags', 'agent_categories', 'search_words', 'search_cjk']:
+        conn.execute(f'DELETE FROM {table} WHERE agent = ?', (rowid,))
+    conn.execute("DELETE FROM localized_strings WHERE owner_type = 'agent' AND owner = ?", (rowid,))
+
+def _update_total(conn):
+    conn.execute("UPDATE registry_info SET value = (SELECT count(*) FROM agents) WHERE key = 'totalAgents'")
+
+def upsert_agent(conn, agent):
+    """Replace the rows of one agent, keeping its row id; caller owns the transaction
+
+    Category links are rebuilt with the same membership rules as the JSON
+    category indexes (category_members).
+    """
+    found = conn.execute('SELECT id FROM agents WHERE author = ? AND agent_id = ?',
+                         (agent['author'], agent['id'])).fetchone()
+    if found:
+        rowid = found[0]
+        _delete_agent_rows(conn, rowid)
+        conn.execute('DELETE FROM agents WHERE id = ?', (rowid,))
+    else:
+        rowid = conn.execute('SELECT coalesce(max(id), 0) + 1 FROM agents').fetchone()[0]
+
+    rows = agent_rows(rowid, agent)
+    for table, table_rows in rows.items():
+        if table != 'tag_names':
+            insert_rows(conn, table, table_rows)
+    for tag in rows['tag_names']:
+        conn.execute('INSERT OR IGNORE INTO tags (tag) VALUES (?)', (tag,))
+        conn.execute('INSERT INTO agent_tags SELECT ?, id FROM tags WHERE tag = ?', (rowid, tag))
+
+    members = category_members({'agents': {f'{agent["author"]}/{agent["id"]}': agent}})
+    for slug in [slug for slug, keys in members.items() if keys]:
+        conn.execute('INSERT INTO agent_categories SELECT ?, id FROM categories WHERE slug = ?', (rowid, slug))
+    _update_total(conn)
+    return rowid
+
+def delete_agent(conn, author, agent_id):
+    """Remove one agent and its dependent rows; caller owns the transaction"""
+    found = conn.execute('SELECT id FROM agents WHERE author = ? AND agent_id = ?',
+                         (author, agent_id)).fetchone()
+    if not found:
+        return False
+    _delete_agent_rows(conn, found[0])
+    conn.execute('DELETE FROM agents WHERE id = ?', (found[0],))
+    _update_total(conn)
+    return True
@@ -0,0 +1,306 @@
+"""
+Version manifest, existence filter and semver range resolution
+
+index/versions.json maps every `author/id` to its sorted version list, the
+latest version and the sha256/size of each version's agent file, so an
+install such as `wshobson/python-pro@^1.2` resolves without fetching the
+agent's metadata.json.
+
+index/versions.bloom is a Bloom filter over every `author/id` and
+`author/id@version` key. A negative answer is definite, so clients can
+reject typos without any further request. File layout (little endian):
+
+    4s  magic b'AGVF'
+    B   format version (1)
+    B   k, number of hash functions
+    H   reserved (0)
+    I   m, number of bits
+    I   n, number of keys
+    ... m bits, bit i is byte i // 8, mask 1 << (i % 8)
+
+Bit positions for a key are (h1 + i * h2) % m for i in range(k), where
+h1 and h2 are the first two little-endian uint64 of sha256(key) and h2 is
+forced odd.
+"""
+
+import re
+import math
+import struct
+import difflib
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+VERSIONS_FILE = Path('index/versions.json')
+FILTER_FILE = Path('index/versions.bloom')
+FILTER_MAGIC = b'AGVF'
+FILTER_FORMAT = 1
+FILTER_HEADER = struct.Struct('<4sBBHII')
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+
+VERSION_RE = re.compile(
+    r'^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+PARTIAL_RE = re.compile(
+    r'^v?(\d+|[xX*])(?:\.(\d+|[xX*]))?(?:\.(\d+|[xX*]))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+COMPARATOR_RE = re.compile(r'^(\^|~>?|>=|<=|>|<|=)?\s*(\S+)$')
+
+def parse_semver(version):
+    """Parse 'MAJOR.MINOR.PATCH[-pre][+build]' into (major, minor, patch, pre)"""
+    match = VERSION_RE.match(version)
+    if not match:
+        raise ValueError(f'invalid version {version!r}')
+    major, minor, patch, pre = match.groups()
+    return int(major), int(minor), int(patch), tuple(pre.split('.')) if pre else ()
+
+def semver_key(version):
+    """Sort key following semver precedence (pre-releases sort before the release)"""
+    major, minor, patch, pre = parse_semver(version) if isinstance(version, str) else version
+    if not pre:
+        return major, minor, patch, (1,)
+    identifiers = tuple((0, int(part), '') if part.isdigit() else (1, 0, part) for part in pre)
+    return major, minor, patch, (0, identifiers)
+
+def sort_versions(versions):
+    return sorted(versions, key=semver_key)
+
+def _parse_partial(text):
+    """Parse a possibly partial version; missing or wildcard parts are None"""
+    match = PARTIAL_RE.match(text)
+    if not match:
+        raise ValueError(f'invalid version {text!r} in range')
+    parts = []
+    for part in match.groups()[:3]:
+        if part is None or part in 'xX*' or (parts and parts[-1] is None):
+            parts.append(None)
+        else:
+            parts.append(int(part))
+    pre = match.group(4)
+    return parts, tuple(pre.split('.')) if pre and None not in parts else ()
+
+def _bump(parts, index):
+    """Lowest version above every version matching parts[:index + 1]"""
+    bumped = [part or 0 for part in parts[:index + 1]]
+    bumped[index] += 1
+    return tuple(bumped + [0] * (2 - index)) + ((),)
+
+def _comparators(operator, text):
+    """Desugar one range token into (op, version) pairs with full versions"""
+    parts, pre = _parse_partial(text)
+    major, minor, patch = parts
+    low = (major or 0, minor or 0, patch or 0, pre)
+    # Index of the last concrete part, -1 for '*'
+    last = max((index for index, part in enumerate(parts) if part is not None), default=-1)
+
+    if operator in ('', '='):
+        if last == 2:
+            return [('=', low)]
+        return [('>=', low), ('<', _bump(parts, last))] if last >= 0 else []
+    if operator in ('~', '~>'):
+        if last < 0:
+            return []
+        return [('>=', low), ('<', _bump(parts, 0 if last == 0 else 1))]
+    if operator == '^':
+        if last < 0:
+            return []
+        # The first non-zero part may not change; a trailing zero part that
+        # was written out still pins that position (^0.0.3 -> <0.0.4)
+        index = next((i for i, part in enumerate(parts[:last + 1]) if part), last)
+        return [('>=', low), ('<', _bump(parts, index))]
+    if last < 0:
+        return [] if operator in ('>=', '<=') else [('<', (0, 0, 0, ('0',)))]
+    if operator == '>':
+        return [('>', low)] if last == 2 else [('>=', _bump(parts, last))]
+    if operator == '<=':
+        return [('<=', low)] if last == 2 else [('<', _bump(parts, last))]
+    return [(operator, low)]
+
+def parse_range(spec):
+    """Parse an npm-style range into a list of alternative comparator lists
+
+    Supports exact and partial versions (1.2.3, 1.2, 1.x), ^, ~, >, >=, <,
+    <=, hyphen ranges (1.2 - 1.4) and alternatives joined with ||.
+    """
+    alternatives = []
+    for alternative in spec.split('||'):
+        alternative = alternative.strip()
+        hyphen = re.match(r'^(\S+)\s+-\s+(\S+)$', alternative)
+        if hyphen:
+            comparators = _comparators('>=', hyphen.group(1)) + _comparators('<=', hyphen.group(2))
+        else:
+            comparators = []
+            tokens = re.findall(r'(?:\^|~>?|>=|<=|>|<|=)?\s*[^\s<>=^~]+', alternative)
+            for token in tokens:
+                match = COMPARATOR_RE.match(token.strip())
+                if not match:
+                    raise ValueError(f'invalid range {spec!r}')
+                comparators.extend(_comparators(match.group(1) or '', match.group(2)))
+        alternatives.append(comparators)
+    return alternatives
+
+def _compare(version, operator, bound):
+    a, b = semver_key(version), semver_key(bound)
+    return {
+        '=': a == b,
+        '>': a > b,
+        '>=': a >= b,
+        '<': a < b,
+        '<=': a <= b
+    }[operator]
+
+def satisfies(version, alternatives):
+    """True if the version matches one of the parsed range alternatives
+
+    Pre-releases only match when a comparator of the same alternative names
+    a pre-release of the same MAJOR.MINOR.PATCH (npm semantics).
+    """
+    parsed = parse_semver(version)
+    for comparators in alternatives:
+        if not all(_compare(parsed, operator, bound) for operator, bound in comparators):
+            continue
+        if parsed[3] and not any(bound[3] and bound[:3] == parsed[:3] for _, bound in comparators):
+            continue
+        return True
+    return False
+
+class BloomFilter:
+    """Bloom filter with the versions.bloom layout described above"""
+
+    def __init__(self, m, k, n=0, bits=None):
+        self.m = m
+        self.k = k
+        self.n = n
+        self.bits = bytearray(bits) if bits is not None else bytearray((m + 7) // 8)
+
+    @classmethod
+    def for_keys(cls, keys, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+        """Size a filter for the keys at the given false positive rate and add them"""
+        keys = sorted(set(keys))
+        n = max(len(keys), 1)
+        m = max(8, math.ceil(-n * math.log(false_positive_rate) / math.log(2) ** 2))
+        m = (m + 7) // 8 * 8
+        k = max(1, round(m / n * math.log(2)))
+        bloom = cls(m, k)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.n += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def to_bytes(self):
+        return FILTER_HEADER.pack(FILTER_MAGIC, FILTER_FORMAT, self.k, 0, self.m, self.n) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, file_format, k, _, m, n = FILTER_HEADER.unpack_from(data)
+        if magic != FILTER_MAGIC or file_format != FILTER_FORMAT:
+            raise ValueError('not a version filter file')
+        bits = data[FILTER_HEADER.size:]
+        if len(bits) != (m + 7) // 8:
+            raise ValueError('truncated version filter file')
+        return cls(m, k, n, bits)
+
+def filter_keys(name, versions):
+    """Filter keys for one agent: its name and every name@version"""
+    return [name] + [f'{name}@{version}' for version in versions]
+
+def build_version_manifest(agents, file_info):
+    """Build {'author/id': {'versions', 'latest', 'files'}} from agent records
+
+    file_info(path) returns (sha256, size) for a registry-relative agent
+    file, or None if it does not exist.
+    """
+    entries = {}
+    for agent in sorted(agents, key=lambda a: (a['author'], a['id'])):
+        name = f'{agent["author"]}/{agent["id"]}'
+        versions = sort_versions(agent.get('versions', {}))
+        files = {}
+        for version in versions:
+            agent_file = agent['versions'][version].get('files', {}).get('agent')
+            info = file_info(f'agents/{name}/{agent_file}') if agent_file else None
+            if info:
+                files[version] = {'file': agent_file, 'sha256': info[0], 'size': info[1]}
+        entries[name] = {
+            'versions': versions,
+            'latest': agent.get('latest') or (versions[-1] if versions else None),
+            'files': files
+        }
+    return entries
+
+def build_version_files(agents, file_info, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+    """Return the versions.json document and the versions.bloom bytes"""
+    entries = build_version_manifest(agents, file_info)
+    keys = [key for name, entry in entries.items() for key in filter_keys(name, entry['versions'])]
+    bloom = BloomFilter.for_keys(keys, false_positive_rate)
+    payload = bloom.to_bytes()
+    document = {
+        'version': '1.0.0',
+        'generatedAt': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'totalAgents': len(entries),
+        'totalVersions': sum(len(entry['versions']) for entry in entries.values()),
+        'filter': {
+            'url': FILTER_FILE.as_posix(),
+            'sha256': hashlib.sha256(payload).hexdigest(),
+            'size': len(payload),
+            'keys': bloom.n,
+            'bits': bloom.m,
+            'hashes': bloom.k,
+            'falsePositiveRate': false_positive_rate
+        },
+        'agents': entries
+    }
+    return document, payload
+
+def resolve(spec, manifest, bloom=None):
+    """Resolve 'author/id[@range]' to one version entry
+
+    Raises LookupError for unknown agents or when no version matches, and
+    ValueError for malformed ranges. With a filter, unknown names and exact
+    versions are rejected before the manifest is consulted.
+    """
+    name, _, range_spec = spec.partition('@')
+    range_spec = range_spec.strip()
+    if bloom is not None:
+        if name not in bloom:
+            raise LookupError(f'{name} is not in the registry')
+        exact = range_spec.lstrip('=')
+        if VERSION_RE.match(exact) and '+' not in exact and f'{name}@{exact}' not in bloom:
+            raise LookupError(f'{name} has no version {exact}')
+
+    agents = manifest['agents']
+    entry = agents.get(name)
+    if entry is None:
+        suggestions = difflib.get_close_matches(name, list(agents), n=3)
+        hint = f' (did you mean {", ".join(suggestions)}?)' if suggestions else ''
+        raise LookupError(f'{name} is not in the registry{hint}')
+
+    if range_spec in ('', 'latest'):
+        version = entry['latest']
+    else:
+        alternatives = parse_range(range_spec)
+        matching = [v for v in entry['versions'] if satisfies(v, alternatives)]
+        if not matching:
+            raise LookupError(f'no version of {name} matches {range_spec} '
+                              f'(available: {", ".join(entry["versions"])})')
+        version = max(matching, key=semver_key)
+
+    file_entry = entry['files'].get(version, {})
+    return {
+        'name': name,
+        'version': version,
+        'file': file_entry.get('file'),
+        'url': f'agents/{name}/{file_entry["file"]}' if file_entry else None,
+        'sha256': file_entry.get('sha256'),
+        'size': file_entry.get('size')
+    }
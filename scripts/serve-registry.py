@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Serve the registry's index/ and agents/ trees over HTTP
+
+JSON files (indexes and agent metadata) are kept in an LRU-bounded in-memory
+hot set together with a precomputed gzip body and a content-hash ETag. Agent
+markdown files are streamed from disk with sendfile. Every response supports
+ETag / If-None-Match, Last-Modified / If-Modified-Since and single Range
+requests. Cached entries are revalidated against the file's stat on each
+request, so files rewritten by a build are picked up immediately.
+
+Files inside published snapshots (snapshots/{hash}/) never change and are
+served with far-future immutable cache headers; only the snapshots/current.json
+pointer must always be revalidated.
+"""
+
+import argparse
+import email.utils
+import gzip
+import hashlib
+import re
+import socket
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+SERVED_DIRS = ('index', 'agents', 'snapshots')
+SNAPSHOT_POINTER = ('snapshots', 'current.json')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+POINTER_CACHE_CONTROL = 'no-cache'
+HOT_SUFFIXES = ('.json',)
+CONTENT_TYPES = {
+    '.json': 'application/json; charset=utf-8',
+    '.md': 'text/markdown; charset=utf-8',
+    '.sqlite': 'application/vnd.sqlite3'
+}
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class HotEntry:
+    """In-memory copy of a file with its precomputed representations"""
+
+    __slots__ = ('body', 'gzip_body', 'etag', 'gzip_etag', 'mtime', 'last_modified', 'stat_key')
+
+    def __init__(self, body, stat_key, mtime):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        self.gzip_etag = self.etag[:-1] + '-gzip"'
+        self.mtime = mtime
+        self.last_modified = email.utils.formatdate(mtime, usegmt=True)
+        self.stat_key = stat_key
+
+    @property
+    def weight(self):
+        return len(self.body) + len(self.gzip_body)
+
+class HotCache:
+    """Thread-safe LRU cache of HotEntry objects bounded by total bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, st):
+        """Return the cached entry for path, (re)loading it if the file changed"""
+        key = stat_key(st)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.stat_key == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        entry = HotEntry(body, key, st.st_mtime)
+        if entry.weight > self.max_bytes:
+            return entry
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self.total_bytes -= old.weight
+            self._entries[path] = entry
+            self.total_bytes += entry.weight
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.weight
+        return entry
+
+def stat_key(st):
+    """Identity of a file version; changes whenever a build rewrites the file"""
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def file_etag(st):
+    return '"%x-%x"' % (st.st_size, st.st_mtime_ns)
+
+def parse_range(header, size):
+    """Parse a single-range header into (start, end) inclusive
+
+    Returns None when the header should be ignored and raises ValueError when
+    the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('range not satisfiable')
+    return start, min(end, size - 1)
+
+class RegistryRequestHandler(BaseHTTPRequestHandler):
+    """Static handler for the registry tree"""
+
+    server_version = 'AgentsRegistry/2.0'
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without TCP_NODELAY
+        # Nagle's algorithm stalls every keep-alive response on delayed ACKs
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def resolve(self):
+        """Map the request path onto (served file, path parts), or (None, None)"""
+        rel_path = unquote(urlsplit(self.path).path).lstrip('/')
+        parts = Path(rel_path).parts
+        if not parts or parts[0] not in SERVED_DIRS or '..' in parts:
+            return None, None
+        path = self.server.root / rel_path
+        return (path, parts) if path.is_file() else (None, None)
+
+    def cache_control_for(self, parts, default):
+        if parts[0] != 'snapshots':
+            return default
+        if parts == SNAPSHOT_POINTER:
+            return POINTER_CACHE_CONTROL
+        return IMMUTABLE_CACHE_CONTROL
+
+    def handle_request(self, send_body):
+        path, parts = self.resolve()
+        if path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            st = path.stat()
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        content_type = CONTENT_TYPES.get(path.suffix, 'application/octet-stream')
+        if path.suffix in HOT_SUFFIXES:
+            entry = self.server.cache.get(path, st)
+            cache_control = self.cache_control_for(parts, self.server.index_cache_control)
+            self.serve_hot(entry, content_type, cache_control, send_body)
+        else:
+            cache_control = self.cache_control_for(parts, self.server.file_cache_control)
+            self.serve_file(path, st, content_type, cache_control, send_body)
+
+    def is_not_modified(self, etags, mtime):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return '*' in tags or not tags.isdisjoint(etags)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def requested_range(self, etag, last_modified, size):
+        """Return (start, end) for a valid Range request, None for a full body"""
+        header = self.headers.get('Range')
+        if not header:
+            return None
+        if_range = self.headers.get('If-Range')
+        if if_range and if_range not in (etag, last_modified):
+            return None
+        return parse_range(header, size)
+
+    def send_common_headers(self, etag, last_modified, cache_control):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Accept-Ranges', 'bytes')
+
+    def send_not_modified(self, etag, last_modified, cache_control, vary=False):
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_common_headers(etag, last_modified, cache_control)
+        if vary:
+            # Must match the 200 response so caches keep gzip/identity apart
+            self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+
+    def send_unsatisfiable(self, size):
+        self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.send_header('Content-Range', f'bytes */{size}')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def serve_hot(self, entry, content_type, cache_control, send_body):
+        accepts_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        etag = entry.gzip_etag if accepts_gzip else entry.etag
+        if self.is_not_modified((entry.etag, entry.gzip_etag), entry.mtime):
+            self.send_not_modified(etag, entry.last_modified, cache_control, vary=True)
+            return
+
+        size = len(entry.body)
+        try:
+            byte_range = self.requested_range(entry.etag, entry.last_modified, size)
+        except ValueError:
+            self.send_unsatisfiable(size)
+            return
+
+        if byte_range is not None:
+            etag = entry.etag
+            start, end = byte_range
+            body = entry.body[start:end + 1]
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        elif accepts_gzip:
+            body = entry.gzip_body
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Encoding', 'gzip')
+        else:
+            body = entry.body
+            self.send_response(HTTPStatus.OK)
+
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_common_headers(etag, entry.last_modified, cache_control)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def serve_file(self, path, st, content_type, cache_control, send_body):
+        etag = file_etag(st)
+        last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        if self.is_not_modified((etag,), st.st_mtime):
+            self.send_not_modified(etag, last_modified, cache_control)
+            return
+
+        try:
+            byte_range = self.requested_range(etag, last_modified, st.st_size)
+        except ValueError:
+            self.send_unsatisfiable(st.st_size)
+            return
+
+        start, end = byte_range if byte_range is not None else (0, st.st_size - 1)
+        count = end - start + 1
+        if byte_range is not None:
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{st.st_size}')
+        else:
+            self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(max(count, 0)))
+        self.send_common_headers(etag, last_modified, cache_control)
+        self.end_headers()
+
+        if send_body and count > 0:
+            # Headers are buffered in wfile; flush them before handing the
+            # socket to sendfile so the kernel copies the body directly
+            self.wfile.flush()
+            with open(path, 'rb') as f:
+                self.connection.sendfile(f, start, count)
+
+class RegistryServer(ThreadingHTTPServer):
+    """HTTP server holding the registry root and the shared hot cache"""
+
+    daemon_threads = True
+
+    def __init__(self, address, root, cache_bytes=DEFAULT_CACHE_BYTES,
+                 index_max_age=60, file_max_age=3600, quiet=False):
+        super().__init__(address, RegistryRequestHandler)
+        self.root = Path(root).resolve()
+        self.cache = HotCache(cache_bytes)
+        self.index_cache_control = f'public, max-age={index_max_age}'
+        self.file_cache_control = f'public, max-age={file_max_age}'
+        self.quiet = quiet
+
+    def warm(self):
+        """Load every index file into the hot set"""
+        loaded = 0
+        for path in sorted((self.root / 'index').rglob('*.json')):
+            self.cache.get(path, path.stat())
+            loaded += 1
+        return loaded
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Serve the agents registry over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--root', default=Path(__file__).parent.parent, help='Registry root directory')
+    parser.add_argument('--cache-bytes', type=int, default=DEFAULT_CACHE_BYTES,
+                        help='Upper bound for the in-memory hot set')
+    parser.add_argument('--index-max-age', type=int, default=60, help='Cache-Control max-age for JSON files')
+    parser.add_argument('--file-max-age', type=int, default=3600, help='Cache-Control max-age for agent files')
+    parser.add_argument('--quiet', action='store_true', help='Disable per-request logging')
+    args = parser.parse_args()
+
+    server = RegistryServer((args.host, args.port), args.root, args.cache_bytes,
+                            args.index_max_age, args.file_max_age, args.quiet)
+    warmed = server.warm()
+    print(f'Loaded {warmed} index files into the hot set ({server.cache.total_bytes} bytes)')
+    print(f'Serving {server.root} on http://{args.host}:{args.port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\nShutting down')
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Mirror the registry into a local cache directory
+
+Files are fetched concurrently over a bounded pool of keep-alive connections.
+Anything whose hash already matches index/manifest.json is skipped without a
+request, everything else is fetched conditionally (If-None-Match /
+If-Modified-Since) and interrupted downloads are resumed with Range requests.
+
+Point --base-url at any static server (e.g. `python -m http.server` run from
+the registry root) to sync from a local stand-in instead of GitHub.
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import time
+from pathlib import Path, PurePosixPath
+from urllib.parse import quote, urlsplit
+
+from registry_data import hash_file
+
+DEFAULT_BASE_URL = 'https://raw.githubusercontent.com/chameleon-nexus/agents-registry/master/'
+DEFAULT_CACHE_DIR = '.registry-cache'
+MANIFEST_PATH = 'index/manifest.json'
+INDEX_PATHS = ['index/main.json', 'index/featured.json']
+STATE_FILE = '.sync-state.json'
+CHUNK_SIZE = 64 * 1024
+
+class SyncError(Exception):
+    """Raised when a file cannot be fetched or fails verification"""
+
+class SyncMetrics:
+    """Counters reported at the end of a sync run"""
+
+    def __init__(self):
+        self.requests = 0
+        self.downloaded = 0
+        self.not_modified = 0
+        self.skipped_by_manifest = 0
+        self.resumed = 0
+        self.errors = 0
+        self.bytes_transferred = 0
+        self.bytes_saved = 0
+        self.started = time.perf_counter()
+
+    @property
+    def requests_saved(self):
+        """Requests avoided entirely plus requests answered without a body"""
+        return self.skipped_by_manifest + self.not_modified
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'requestsSaved': self.requests_saved,
+            'downloaded': self.downloaded,
+            'notModified': self.not_modified,
+            'skippedByManifest': self.skipped_by_manifest,
+            'resumed': self.resumed,
+            'errors': self.errors,
+            'bytesTransferred': self.bytes_transferred,
+            'bytesSaved': self.bytes_saved,
+            'elapsedSeconds': round(time.perf_counter() - self.started, 3)
+        }
+
+class ConnectionPool:
+    """Bounded pool of keep-alive HTTP connections to the registry host"""
+
+    def __init__(self, base_url, size, timeout=30):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise SyncError(f'Unsupported base URL: {base_url}')
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path if parts.path.endswith('/') else parts.path + '/'
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+
+    def url_path(self, rel_path):
+        return self.base_path + quote(rel_path)
+
+    def connect(self):
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    async def acquire(self):
+        """Return (connection, reused): reused connections may have been closed by the server"""
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop(), True
+        return self.connect(), False
+
+    def release(self, conn, reusable=True):
+        if reusable:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+def _fetch_blocking(conn, url_path, headers, part_file, validators):
+    """Issue one GET on a pooled connection and stream the body to part_file
+
+    Runs in a worker thread. The response validators are stored in
+    `validators` before the body is read so an interrupted transfer can be
+    resumed later. Returns (status, response headers, bytes read, reusable).
+    """
+    conn.request('GET', url_path, headers=headers)
+    response = conn.getresponse()
+    status = response.status
+    received = 0
+
+    if status in (200, 206):
+        if status == 200:
+            validators['etag'] = response.getheader('ETag')
+            validators['lastModified'] = response.getheader('Last-Modified')
+        part_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(part_file, 'ab' if status == 206 else 'wb') as f:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                f.write(chunk)
+                received += len(chunk)
+    else:
+        received = len(response.read())
+
+    reusable = not response.will_close
+    return status, dict(response.getheaders()), received, reusable
+
+class RegistrySync:
+    """Mirror registry files from base_url into cache_dir"""
+
+    def __init__(self, base_url, cache_dir, concurrency=8, timeout=30):
+        self.base_url = base_url
+        self.cache_dir = Path(cache_dir)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.metrics = SyncMetrics()
+        self.state = self._load_state()
+        self.pool = None
+
+    def _load_state(self):
+        state_file = self.cache_dir / STATE_FILE
+        if not state_file.exists():
+            return {}
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        state_file = self.cache_dir / STATE_FILE
+        tmp_file = state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, state_file)
+
+    def local_path(self, rel_path):
+        # Reject anything that would escape the cache directory
+        parts = PurePosixPath(rel_path).parts
+        if not parts or rel_path.startswith('/') or '..' in parts:
+            raise SyncError(f'Refusing unsafe path: {rel_path}')
+        return self.cache_dir.joinpath(*parts)
+
+    def _is_current(self, rel_path, expected):
+        """True if the cached copy already matches the manifest entry
+
+        Without a state entry (state file lost, cache filled by other means)
+        the local file is hashed once and, if it matches, recorded.
+        """
+        entry = self.state.get(rel_path)
+        local = self.local_path(rel_path)
+        if not local.exists() or local.stat().st_size != expected['size']:
+            return False
+        if entry:
+            return entry.get('sha256') == expected['sha256']
+        if hash_file(local)[0] != expected['sha256']:
+            return False
+        self.state[rel_path] = {'sha256': expected['sha256'], 'size': expected['size']}
+        return True
+
+    async def fetch(self, rel_path, expected=None):
+        """Fetch a single file, honouring the manifest and cached validators"""
+        if expected and self._is_current(rel_path, expected):
+            self.metrics.skipped_by_manifest += 1
+            self.metrics.bytes_saved += expected['size']
+            return False
+
+        local = self.local_path(rel_path)
+        part_file = local.with_name(local.name + '.part')
+        entry = self.state.get(rel_path, {})
+
+        headers = {'Accept-Encoding': 'identity'}
+        if local.exists():
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('lastModified'):
+                headers['If-Modified-Since'] = entry['lastModified']
+
+        offset = part_file.stat().st_size if part_file.exists() else 0
+        validator = entry.get('partialEtag') or entry.get('partialLastModified')
+        if offset and validator:
+            headers['Range'] = f'bytes={offset}-'
+            headers['If-Range'] = validator
+        elif offset:
+            # Without a validator the partial body cannot be trusted
+            part_file.unlink()
+            offset = 0
+
+        validators = {
+            'etag': entry.get('partialEtag'),
+            'lastModified': entry.get('partialLastModified')
+        }
+        conn, reused = await self.pool.acquire()
+        reusable = False
+        try:
+            self.metrics.requests += 1
+            try:
+                status, response_headers, received, reusable = await asyncio.to_thread(
+                    _fetch_blocking, conn, self.pool.url_path(rel_path), headers, part_file, validators)
+            except (http.client.RemoteDisconnected, BrokenPipeError):
+                if not reused:
+                    raise
+                # The server closed the idle keep-alive connection before
+                # answering; retry once on a fresh connection
+                conn.close()
+                conn = self.pool.connect()
+                self.metrics.requests += 1
+                status, response_headers, received, reusable = await asyncio.to_thread(
+                    _fetch_blocking, conn, self.pool.url_path(rel_path), headers, part_file, validators)
+        except (OSError, http.client.HTTPException) as e:
+            self._remember_partial(rel_path, part_file, entry, validators)
+            raise SyncError(f'{rel_path}: {e}') from e
+        finally:
+            self.pool.release(conn, reusable)
+
+        self.metrics.bytes_transferred += received
+
+        if status == 304:
+            self.metrics.not_modified += 1
+            self.metrics.bytes_saved += local.stat().st_size
+            return False
+        if status == 416 and part_file.exists():
+            part_file.unlink()
+        if status not in (200, 206):
+            raise SyncError(f'{rel_path}: HTTP {status}')
+        if status == 206:
+            self.metrics.resumed += 1
+
+        digest = hash_file(part_file)[0]
+        if expected and digest != expected['sha256']:
+            part_file.unlink()
+            raise SyncError(f'{rel_path}: sha256 mismatch against manifest')
+
+        os.replace(part_file, local)
+        self.state[rel_path] = {
+            'sha256': digest,
+            'size': local.stat().st_size,
+            'etag': response_headers.get('ETag'),
+            'lastModified': response_headers.get('Last-Modified')
+        }
+        self.metrics.downloaded += 1
+        return True
+
+    def _remember_partial(self, rel_path, part_file, entry, validators):
+        """Keep the validators of an interrupted download so it can be resumed"""
+        if not part_file.exists():
+            return
+        entry = dict(entry)
+        entry['partialEtag'] = validators.get('etag')
+        entry['partialLastModified'] = validators.get('lastModified')
+        self.state[rel_path] = entry
+
+    async def fetch_many(self, targets):
+        """Fetch (path, expected) pairs concurrently, collecting failures"""
+        results = await asyncio.gather(
+            *(self.fetch(path, expected) for path, expected in targets),
+            return_exceptions=True)
+        failures = []
+        for (path, _), result in zip(targets, results):
+            if isinstance(result, SyncError):
+                self.metrics.errors += 1
+                failures.append(str(result))
+            elif isinstance(result, BaseException):
+                raise result
+        return failures
+
+    def read_json(self, rel_path):
+        with open(self.local_path(rel_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def discover_agent_files(self, category_paths):
+        """List agent metadata and versioned files referenced by category indexes"""
+        paths = set()
+        for category_path in category_paths:
+            try:
+                category = self.read_json(category_path)
+            except (OSError, ValueError):
+                continue
+            for agent in category.get('agents', []):
+                agent_dir = f'agents/{agent["author"]}/{agent["id"]}'
+                paths.add(f'{agent_dir}/metadata.json')
+                detail = agent.get('detail')
+                if detail:
+                    paths.add(detail['url'])
+                latest = agent.get('files', {}).get('latest')
+                if latest:
+                    paths.add(f'{agent_dir}/{latest}')
+                for version in agent.get('versions', {}).values():
+                    agent_file = version.get('files', {}).get('agent')
+                    if agent_file:
+                        paths.add(f'{agent_dir}/{agent_file}')
+        return sorted(paths)
+
+    async def run(self):
+        """Sync the whole registry, returning the list of failures"""
+        self.pool = ConnectionPool(self.base_url, self.concurrency, self.timeout)
+        try:
+            try:
+                await self.fetch(MANIFEST_PATH)
+                manifest = self.read_json(MANIFEST_PATH)
+            except (SyncError, OSError, ValueError):
+                manifest = None
+
+            if manifest is not None:
+                targets = sorted(manifest.get('files', {}).items())
+                failures = await self.fetch_many(targets)
+            else:
+                # No manifest published: walk the indexes instead
+                failures = await self.fetch_many([(path, None) for path in INDEX_PATHS])
+                try:
+                    main_index = self.read_json('index/main.json')
+                except (OSError, ValueError) as e:
+                    # Nothing to walk; a failed fetch has already been reported
+                    if not failures:
+                        failures.append(f'index/main.json: {e}')
+                    return failures
+                category_paths = [cat['url'] for cat in main_index.get('categories', {}).values()]
+                failures += await self.fetch_many([(path, None) for path in category_paths])
+                agent_paths = self.discover_agent_files(category_paths)
+                failures += await self.fetch_many([(path, None) for path in agent_paths])
+        finally:
+            self.pool.close()
+            self._save_state()
+        return failures
+
+def print_summary(metrics, failures):
+    """Print a human-readable summary of a sync run"""
+    stats = metrics.to_dict()
+    print('\n[SUMMARY] Sync completed!')
+    print(f'  Requests sent: {stats["requests"]}')
+    print(f'  Requests saved: {stats["requestsSaved"]} '
+          f'({stats["skippedByManifest"]} by manifest, {stats["notModified"]} not modified)')
+    print(f'  Downloaded: {stats["downloaded"]} ({stats["resumed"]} resumed)')
+    print(f'  Bytes transferred: {stats["bytesTransferred"]}')
+    print(f'  Bytes saved: {stats["bytesSaved"]}')
+    print(f'  Elapsed: {stats["elapsedSeconds"]}s')
+    for failure in failures:
+        print(f'  [ERROR] {failure}')
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Mirror the agents registry into a local cache')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='Registry root URL')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Local cache directory')
+    parser.add_argument('--concurrency', type=int, default=8, help='Maximum open connections')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--metrics-json', help='Also write metrics to this file')
+    args = parser.parse_args()
+
+    sync = RegistrySync(args.base_url, args.cache_dir, args.concurrency, args.timeout)
+    print(f'Syncing {args.base_url} into {args.cache_dir}...')
+    failures = asyncio.run(sync.run())
+    print_summary(sync.metrics, failures)
+
+    if args.metrics_json:
+        with open(args.metrics_json, 'w', encoding='utf-8') as f:
+            json.dump(sync.metrics.to_dict(), f, indent=2)
+
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,11 @@ Translate agent names and descriptions to Chinese and Japanese
 """
 
 import os
-import json
 from pathlib import Path
 
+from build_trace import current as current_tracer, tracing
+from registry_data import read_json, write_json
+
 # Translation mappings for common programming terms and agent types
 TRANSLATIONS = {
     # Programming languages
@@ -407,6 +409,10 @@ def translate_text(text, target_lang):
     # Return original if no translation found
     return text
 
+def needs_translation(field, lang):
+    """True if a localized field has no curated text for lang (missing or an English copy)"""
+    return not field.get(lang) or field.get(lang) == field.get('en')
+
 def translate_agent_metadata(agent_path):
     """Translate a single agent's metadata"""
     metadata_file = agent_path / "metadata.json"
@@ -414,8 +420,7 @@ def translate_agent_metadata(agent_path):
         return False
     
     try:
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        metadata = read_json(metadata_file)
         
         agent_id = metadata.get('id', '')
         print(f"  [TRANSLATING] {agent_id}")
@@ -423,26 +428,28 @@ def translate_agent_metadata(agent_path):
         # Translate name field
         if 'name' in metadata and isinstance(metadata['name'], dict):
             en_name = metadata['name'].get('en', agent_id)
-            metadata['name']['zh'] = translate_text(en_name, 'zh')
-            metadata['name']['ja'] = translate_text(en_name, 'ja')
+            for lang in ['zh', 'ja']:
+                if needs_translation(metadata['name'], lang):
+                    metadata['name'][lang] = translate_text(en_name, lang)
         
         # Translate description field  
         if 'description' in metadata and isinstance(metadata['description'], dict):
             en_desc = metadata['description'].get('en', '')
             # For descriptions, we'll keep them in English for now 
             # as they are quite long and complex
-            metadata['description']['zh'] = en_desc  # TODO: Translate long descriptions
-            metadata['description']['ja'] = en_desc  # TODO: Translate long descriptions
+            for lang in ['zh', 'ja']:
+                if needs_translation(metadata['description'], lang):
+                    metadata['description'][lang] = en_desc  # TODO: Translate long descriptions
         
         # Translate longDescription field
         if 'longDescription' in metadata and isinstance(metadata['longDescription'], dict):
             en_long_desc = metadata['longDescription'].get('en', '')
-            metadata['longDescription']['zh'] = en_long_desc  # TODO: Translate
-            metadata['longDescription']['ja'] = en_long_desc  # TODO: Translate
+            for lang in ['zh', 'ja']:
+                if needs_translation(metadata['longDescription'], lang):
+                    metadata['longDescription'][lang] = en_long_desc  # TODO: Translate
         
         # Save updated metadata
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        write_json(metadata_file, metadata)
         
         print(f"    [SUCCESS] Translated name: {metadata['name']}")
         return True
@@ -475,7 +482,9 @@ def translate_all_agents():
             if not agent_dir.is_dir():
                 continue
             
-            if translate_agent_metadata(agent_dir):
+            with current_tracer().span(f'{author_dir.name}/{agent_dir.name}', 'agent'):
+                translated = translate_agent_metadata(agent_dir)
+            if translated:
                 translated_count += 1
             else:
                 error_count += 1
@@ -483,7 +492,7 @@ def translate_all_agents():
     print(f"\n[SUMMARY] Translation completed!")
     print(f"  Successfully translated: {translated_count}")
     print(f"  Errors: {error_count}")
-    print(f"  Note: Descriptions kept in English (too complex for auto-translation)")
+    print(f"  Note: Existing translations are kept; missing descriptions fall back to English")
 
 if __name__ == "__main__":
     # Change to agents-registry directory
@@ -491,4 +500,5 @@ if __name__ == "__main__":
     registry_dir = script_dir.parent
     os.chdir(registry_dir)
     
-    translate_all_agents()
+    with tracing('translate-agents'):
+        translate_all_agents()
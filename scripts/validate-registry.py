@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Validate registry metadata and index files, alone and against each other
+
+Every JSON file is checked against its schema (compiled once per process,
+see registry_schemas.py) in parallel worker processes. Cross-index checks
+then make sure that main.json counts, category files, featured.json, detail
+files, the manifest and each agent's metadata.json agree.
+
+Results are cached in .cache/validate-registry.json: a file whose content
+hash already passed under the current schemas is not validated again, file
+hashes are reused while size and mtime are unchanged, and the cross-index
+checks are skipped when no file in the tree changed. Exits with status 1 on
+any error.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_trace import current as current_tracer, tracing
+from registry_data import LOCAL_FILES, hash_file
+from registry_schemas import compile_all, schemas_fingerprint
+from registry_versions import BloomFilter, filter_keys, sort_versions
+
+CACHE_FILE = Path('.cache/validate-registry.json')
+CACHE_VERSION = 1
+PUBLISHED_DIRS = ['index', 'agents']
+# Below this many files the process pool costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+_compiled = None
+
+def file_kind(rel_path):
+    """Schema kind for a registry-relative path, or None if not schema-checked"""
+    parts = rel_path.split('/')
+    if rel_path == 'index/main.json':
+        return 'main'
+    if rel_path == 'index/featured.json':
+        return 'featured'
+    if rel_path == 'index/manifest.json':
+        return 'manifest'
+    if rel_path == 'index/versions.json':
+        return 'versions'
+    if parts[:2] == ['index', 'categories'] and rel_path.endswith('.json'):
+        return 'category'
+    if parts[:2] == ['index', 'details'] and rel_path.endswith('.json'):
+        return 'detail'
+    if parts[0] == 'agents' and len(parts) == 4 and parts[3] == 'metadata.json':
+        return 'metadata'
+    return None
+
+def validate_file(task):
+    """Worker: parse one file and validate it against the schema for its kind"""
+    global _compiled
+    if _compiled is None:
+        _compiled = compile_all()
+    rel_path, kind = task
+    try:
+        with open(rel_path, 'rb') as f:
+            data = json.loads(f.read())
+    except (OSError, ValueError) as e:
+        return rel_path, [f'cannot parse: {e}']
+    errors = []
+    _compiled[kind](data, '', errors)
+    return rel_path, errors
+
+def load_cache(fingerprint):
+    if not CACHE_FILE.exists():
+        return {'files': {}, 'passed': {}, 'tree': None}
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {'files': {}, 'passed': {}, 'tree': None}
+    if cache.get('version') != CACHE_VERSION or cache.get('schemas') != fingerprint:
+        # Stat/hash entries stay valid, validation results do not
+        return {'files': cache.get('files', {}), 'passed': {}, 'tree': None}
+    return cache
+
+def save_cache(cache, fingerprint):
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    cache = dict(cache, version=CACHE_VERSION, schemas=fingerprint)
+    tmp_file = CACHE_FILE.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, CACHE_FILE)
+
+def hash_tree(cache):
+    """Return {path: sha256} for every published file, reusing cached hashes"""
+    cached = cache['files']
+    fresh = {}
+    hashes = {}
+    for top in PUBLISHED_DIRS:
+        for path in Path(top).rglob('*'):
+            rel_path = path.as_posix()
+            if not path.is_file() or rel_path in LOCAL_FILES:
+                continue
+            st = path.stat()
+            entry = cached.get(rel_path)
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                sha256 = entry[2]
+            else:
+                sha256 = hash_file(path)[0]
+            fresh[rel_path] = [st.st_size, st.st_mtime_ns, sha256]
+            hashes[rel_path] = sha256
+    cache['files'] = fresh
+    return hashes
+
+def tree_digest(hashes):
+    digest = hashlib.sha256()
+    for rel_path, sha256 in sorted(hashes.items()):
+        digest.update(f'{rel_path}\0{sha256}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+def validate_schemas(tasks, jobs):
+    """Validate (path, kind) tasks, in parallel when worthwhile"""
+    if jobs > 1 and len(tasks) >= PARALLEL_THRESHOLD:
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return dict(pool.map(validate_file, tasks, chunksize=chunksize))
+    return dict(validate_file(task) for task in tasks)
+
+def read_json_safe(rel_path, errors):
+    try:
+        with open(rel_path, 'rb') as f:
+            return json.loads(f.read())
+    except (OSError, ValueError) as e:
+        errors.append(f'{rel_path}: cannot parse: {e}')
+        return None
+
+def check_consistency(hashes):
+    """Cross-index checks; returns a list of error strings"""
+    errors = []
+    metadata = {}
+    for rel_path in hashes:
+        if file_kind(rel_path) != 'metadata':
+            continue
+        _, author, agent_dir, _ = rel_path.split('/')
+        data = read_json_safe(rel_path, errors)
+        if not isinstance(data, dict):
+            continue
+        metadata[(author, agent_dir)] = data
+        if data.get('id') != agent_dir:
+            errors.append(f'{rel_path}: id {data.get("id")!r} does not match directory {agent_dir!r}')
+        latest = data.get('latest')
+        versions = data.get('versions', {})
+        if latest not in versions:
+            errors.append(f'{rel_path}: latest {latest!r} is not listed in versions')
+        for version, info in versions.items():
+            agent_file = info.get('files', {}).get('agent')
+            if agent_file and f'agents/{author}/{agent_dir}/{agent_file}' not in hashes:
+                errors.append(f'{rel_path}: file {agent_file} for version {version} does not exist')
+
+    main = read_json_safe('index/main.json', errors) or {}
+    categories = main.get('categories', {})
+    if main and main.get('totalAgents') != len(metadata):
+        errors.append(f'index/main.json: totalAgents is {main.get("totalAgents")} '
+                      f'but the registry has {len(metadata)} agents')
+
+    def check_records(rel_path, records, slug=None):
+        # A record's category must be the agent's metadata category or a
+        # registry category (the file's own category for category indexes)
+        allowed_categories = {slug} if slug else set(categories)
+        for index, record in enumerate(records):
+            where = f'{rel_path}: agents/{index} ({record.get("author")}/{record.get("id")})'
+            meta = metadata.get((record.get('author'), record.get('id')))
+            if meta is None:
+                errors.append(f'{where}: no agents/{record.get("author")}/{record.get("id")}/metadata.json')
+                continue
+            if 'version' in record and record['version'] != meta.get('latest'):
+                errors.append(f'{where}: version {record["version"]} but metadata latest is {meta.get("latest")}')
+            latest_file = record.get('files', {}).get('latest')
+            if latest_file and f'agents/{record["author"]}/{record["id"]}/{latest_file}' not in hashes:
+                errors.append(f'{where}: files.latest {latest_file} does not exist')
+            category = record.get('category')
+            if category is not None and category != meta.get('category') and category not in allowed_categories:
+                expected = repr(slug) if slug else 'a registry category'
+                errors.append(f'{where}: category {category!r} is neither the metadata category '
+                              f'{meta.get("category")!r} nor {expected}')
+            detail = record.get('detail')
+            if detail:
+                detail_hash = hashes.get(detail.get('url'))
+                if detail_hash is None:
+                    errors.append(f'{where}: detail file {detail.get("url")} does not exist')
+                elif detail_hash != detail.get('sha256'):
+                    errors.append(f'{where}: detail file {detail["url"]} sha256 mismatch')
+
+    listed = set()
+    for slug, entry in categories.items():
+        rel_path = entry.get('url', f'index/categories/{slug}.json')
+        listed.add(rel_path)
+        if rel_path not in hashes:
+            errors.append(f'index/main.json: category {slug} points to missing {rel_path}')
+            continue
+        category = read_json_safe(rel_path, errors)
+        if not isinstance(category, dict):
+            continue
+        agents = category.get('agents', [])
+        if category.get('category') != slug:
+            errors.append(f'{rel_path}: category is {category.get("category")!r}, expected {slug!r}')
+        if category.get('totalAgents') != len(agents):
+            errors.append(f'{rel_path}: totalAgents is {category.get("totalAgents")} but lists {len(agents)} agents')
+        if entry.get('count') != len(agents):
+            errors.append(f'index/main.json: count for {slug} is {entry.get("count")} '
+                          f'but {rel_path} lists {len(agents)} agents')
+        check_records(rel_path, agents, slug)
+
+    for rel_path in hashes:
+        if file_kind(rel_path) == 'category' and rel_path not in listed:
+            errors.append(f'{rel_path}: not referenced from index/main.json')
+
+    featured = read_json_safe('index/featured.json', errors)
+    if isinstance(featured, dict):
+        agents = featured.get('agents', [])
+        if featured.get('totalAgents') != len(agents):
+            errors.append(f'index/featured.json: totalAgents is {featured.get("totalAgents")} '
+                          f'but lists {len(agents)} agents')
+        check_records('index/featured.json', agents)
+
+    if 'index/versions.json' in hashes:
+        errors.extend(check_versions(hashes, metadata))
+
+    if 'index/manifest.json' in hashes:
+        manifest = read_json_safe('index/manifest.json', errors) or {}
+        entries = manifest.get('files', {})
+        for rel_path, sha256 in hashes.items():
+            if rel_path == 'index/manifest.json':
+                continue
+            entry = entries.get(rel_path)
+            if entry is None:
+                errors.append(f'index/manifest.json: {rel_path} is not listed')
+            elif entry.get('sha256') != sha256:
+                errors.append(f'index/manifest.json: {rel_path} sha256 is out of date')
+        for rel_path in entries:
+            if rel_path not in hashes:
+                errors.append(f'index/manifest.json: lists missing file {rel_path}')
+
+    return errors
+
+def check_versions(hashes, metadata):
+    """Check versions.json and its filter against every agent's metadata"""
+    errors = []
+    versions = read_json_safe('index/versions.json', errors)
+    if not isinstance(versions, dict):
+        return errors
+    entries = versions.get('agents', {})
+    for (author, agent_dir), meta in sorted(metadata.items()):
+        name = f'{author}/{agent_dir}'
+        entry = entries.get(name)
+        if entry is None:
+            errors.append(f'index/versions.json: {name} is not listed')
+            continue
+        try:
+            expected = sort_versions(meta.get('versions', {}))
+        except ValueError:
+            # Reported by the metadata schema check
+            continue
+        if entry.get('versions') != expected:
+            errors.append(f'index/versions.json: {name} versions {entry.get("versions")} '
+                          f'do not match metadata {expected}')
+        if entry.get('latest') != meta.get('latest'):
+            errors.append(f'index/versions.json: {name} latest is {entry.get("latest")} '
+                          f'but metadata latest is {meta.get("latest")}')
+        for version, file_entry in entry.get('files', {}).items():
+            file_hash = hashes.get(f'agents/{name}/{file_entry.get("file")}')
+            if file_hash != file_entry.get('sha256'):
+                errors.append(f'index/versions.json: {name}@{version} file hash does not match '
+                              f'agents/{name}/{file_entry.get("file")}')
+    for name in entries:
+        if tuple(name.split('/', 1)) not in metadata:
+            errors.append(f'index/versions.json: lists {name} which has no metadata.json')
+
+    bloom_ref = versions.get('filter', {})
+    bloom_path = bloom_ref.get('url')
+    if hashes.get(bloom_path) != bloom_ref.get('sha256'):
+        errors.append(f'index/versions.json: filter {bloom_path} is missing or its sha256 is out of date')
+        return errors
+    try:
+        with open(bloom_path, 'rb') as f:
+            bloom = BloomFilter.from_bytes(f.read())
+    except (OSError, ValueError) as e:
+        errors.append(f'{bloom_path}: cannot load: {e}')
+        return errors
+    for name, entry in entries.items():
+        for key in filter_keys(name, entry.get('versions', [])):
+            if key not in bloom:
+                errors.append(f'{bloom_path}: missing key {key}')
+    return errors
+
+def validate_registry(jobs, use_cache=True):
+    """Run all checks and return (errors, stats)"""
+    tracer = current_tracer()
+    fingerprint = schemas_fingerprint()
+    cache = load_cache(fingerprint) if use_cache else {'files': {}, 'passed': {}, 'tree': None}
+
+    with tracer.span('hash-tree'):
+        hashes = hash_tree(cache)
+
+    tasks = []
+    passed = {}
+    for rel_path, sha256 in sorted(hashes.items()):
+        kind = file_kind(rel_path)
+        if kind is None:
+            continue
+        if cache['passed'].get(rel_path) == sha256:
+            passed[rel_path] = sha256
+        else:
+            tasks.append((rel_path, kind))
+
+    cached_count = len(passed)
+    errors = []
+    with tracer.span('schemas', files=len(tasks)):
+        results = validate_schemas(tasks, jobs)
+    for rel_path, file_errors in sorted(results.items()):
+        if file_errors:
+            errors.extend(f'{rel_path}: {error}' for error in file_errors)
+        else:
+            passed[rel_path] = hashes[rel_path]
+
+    digest = tree_digest(hashes)
+    cross_cached = cache.get('tree') == digest
+    if not cross_cached:
+        with tracer.span('consistency'):
+            errors.extend(check_consistency(hashes))
+
+    cache['passed'] = passed
+    cache['tree'] = digest if not errors else None
+    if use_cache:
+        save_cache(cache, fingerprint)
+
+    stats = {
+        'files': len(hashes),
+        'schemaChecked': len(tasks),
+        'schemaCached': cached_count,
+        'consistencyCached': cross_cached
+    }
+    return errors, stats
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Validate registry metadata and indexes')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not update the result cache')
+    args = parser.parse_args()
+
+    # Change to registry directory
+    script_dir = Path(__file__).parent
+    registry_dir = script_dir.parent
+    os.chdir(registry_dir)
+
+    with tracing('validate-registry'):
+        errors, stats = validate_registry(args.jobs, use_cache=not args.no_cache)
+
+    for error in errors:
+        print(f'[ERROR] {error}')
+    print(f'\nChecked {stats["files"]} files: {stats["schemaChecked"]} schema-validated, '
+          f'{stats["schemaCached"]} cached, consistency '
+          f'{"cached" if stats["consistencyCached"] else "checked"}')
+    if errors:
+        print(f'[FAILED] {len(errors)} errors')
+        sys.exit(1)
+    print('[OK] Registry is consistent')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Watch agents/ and keep the generated indexes up to date
+
+The registry is loaded once and kept in memory. agents/ is polled with
+stat() calls, so no inotify binding or file-watching service is needed; a
+scan of the whole tree costs well under a millisecond. When files change,
+only the touched metadata.json files are parsed again and only the index
+files that depend on them are rewritten:
+
+    index/details/{author}/{id}.json   the touched agents
+    index/categories/{slug}.json       categories that list a touched agent
+    index/featured.json                when a featured agent changed
+    index/main.json                    when agent or category counts changed
+    index/registry.sqlite              rows of the touched agents, if exported
+    index/versions.{json,bloom}        when versions or agent files changed
+    index/manifest.json                entries of every changed file
+
+On startup the daemon runs one full build (the same output as
+generate-correct-categories.py and generate-versions.py followed by
+generate-manifest.py).
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_trace import current as current_tracer, tracing
+from registry_categories import (CATEGORIES_DIR, FEATURED_FILE, MAIN_FILE, build_category_file,
+                                 build_featured_file, categorize_agents_correctly, main_with_counts)
+from registry_data import (AGENTS_DIR, LOCAL_FILES, agent_from_metadata, detail_path, hash_file,
+                           read_json, write_bytes, write_json, write_json_if_changed)
+from registry_sqlite import delete_agent, upsert_agent
+from registry_versions import FILTER_FILE, VERSIONS_FILE, build_version_files
+
+MANIFEST_FILE = Path('index/manifest.json')
+SQLITE_FILE = Path('index/registry.sqlite')
+PUBLISHED_DIRS = ['index', 'agents']
+
+def scan_tree(top=AGENTS_DIR):
+    """Return {registry-relative path: (mtime_ns, size, inode)} for every file under top"""
+    stats = {}
+    for root, _, files in os.walk(top):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stats[Path(path).as_posix()] = (st.st_mtime_ns, st.st_size, st.st_ino)
+    return stats
+
+def is_metadata(rel_path):
+    parts = rel_path.split('/')
+    return len(parts) == 4 and parts[0] == AGENTS_DIR.name and parts[3] == 'metadata.json'
+
+def agent_key(agent):
+    return agent['author'], agent['id']
+
+def now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class RegistryWatcher:
+    """In-memory registry plus the index state derived from it"""
+
+    def __init__(self, use_sqlite=True):
+        self.use_sqlite = use_sqlite
+        self.stats = {}         # agents/ path -> stat key
+        self.agents = {}        # metadata.json path -> agent record
+        self.details = {}       # (author, id) -> detail reference
+        self.memberships = {}   # category slug -> {(author, id)}
+        self.main = None
+        self.featured = None
+        self.featured_source = None
+        self.manifest = {}      # path -> {'sha256', 'size'}
+        self.versions = None
+
+    def load_agent(self, rel_path):
+        """Parse one metadata.json; None (with an error printed) if it is invalid"""
+        try:
+            metadata = read_json(rel_path)
+        except (OSError, ValueError) as e:
+            print(f'[ERROR] {rel_path}: {e}')
+            return None
+        if not isinstance(metadata, dict) or not isinstance(metadata.get('id'), str):
+            print(f'[ERROR] {rel_path}: not an agent metadata document')
+            return None
+        return agent_from_metadata(rel_path.split('/')[1], metadata)
+
+    def by_key(self):
+        return {agent_key(agent): agent for agent in self.agents.values()}
+
+    def categorize(self):
+        registry = {'agents': {f'{author}/{agent_id}': agent
+                               for (author, agent_id), agent in self.by_key().items()}}
+        return categorize_agents_correctly(registry)
+
+    def write_categories(self, categorized, slugs, written, removed):
+        """Rewrite the given category files (and missing detail files)"""
+        tracer = current_tracer()
+        for slug in slugs:
+            category_data = categorized[slug]
+            path = CATEGORIES_DIR / f'{slug}.json'
+            self.memberships[slug] = {agent_key(agent) for agent in category_data['agents']}
+            if not category_data['agents']:
+                if path.exists():
+                    path.unlink()
+                    removed.add(path.as_posix())
+                continue
+            with tracer.span(slug, 'category'):
+                known = set(self.details)
+                category_file = build_category_file(slug, category_data, self.details)
+                written[path.as_posix()] = write_json(path, category_file)
+            for key in set(self.details) - known:
+                written[self.details[key]['url']] = None
+
+    def update_main(self, categorized, written):
+        """Sync agent, category and featured counts into main.json if they changed"""
+        main = main_with_counts(self.main, categorized, len(self.agents))
+        if self.featured is not None and 'featured' in main:
+            main['featured'] = dict(main['featured'], count=len(self.featured['agents']))
+        if main != self.main:
+            self.main = main
+            # Same layout as generate-correct-categories.py (inline scalar arrays)
+            written[MAIN_FILE.as_posix()] = write_json(MAIN_FILE, main, inline_lists=True)
+
+    def update_featured(self, written):
+        """Follow version, detail and removal changes of featured agents
+
+        The curated list as read at startup stays the source, so an agent
+        that disappears (or is briefly invalid) comes back when it returns.
+        """
+        if self.featured_source is None:
+            return
+        known = set(self.details)
+        featured = build_featured_file(self.featured_source, self.by_key(), self.details)
+        for key in set(self.details) - known:
+            written[self.details[key]['url']] = None
+        if featured != self.featured:
+            self.featured = featured
+            written[FEATURED_FILE.as_posix()] = write_json(FEATURED_FILE, featured, inline_lists=True)
+
+    def update_sqlite(self, touched, written):
+        """Replace the rows of touched agents in an exported database"""
+        if not self.use_sqlite or not SQLITE_FILE.exists():
+            return
+        agents = self.by_key()
+        with current_tracer().span('sqlite', touched=len(touched)):
+            conn = sqlite3.connect(SQLITE_FILE, isolation_level=None)
+            try:
+                conn.execute('BEGIN')
+                for author, agent_id in sorted(touched):
+                    agent = agents.get((author, agent_id))
+                    if agent is None:
+                        delete_agent(conn, author, agent_id)
+                    else:
+                        upsert_agent(conn, agent)
+                conn.execute('COMMIT')
+            finally:
+                conn.close()
+        written[SQLITE_FILE.as_posix()] = None
+
+    def record_files(self, written, removed):
+        """Refresh manifest entries for written and removed paths"""
+        for rel_path in removed:
+            self.manifest.pop(rel_path, None)
+        for rel_path, payload in written.items():
+            if rel_path in LOCAL_FILES:
+                continue
+            if payload is None:
+                sha256, size = hash_file(rel_path)
+            else:
+                sha256, size = hashlib.sha256(payload).hexdigest(), len(payload)
+            self.manifest[rel_path] = {'sha256': sha256, 'size': size}
+
+    def update_versions(self, written):
+        """Rewrite versions.json and its filter when versions or agent files changed"""
+        def file_info(rel_path):
+            entry = self.manifest.get(rel_path)
+            return (entry['sha256'], entry['size']) if entry else None
+
+        with current_tracer().span('versions'):
+            document, payload = build_version_files(self.agents.values(), file_info)
+        if self.versions is not None and document['agents'] == self.versions['agents']:
+            return
+        self.versions = document
+        files = {
+            VERSIONS_FILE.as_posix(): write_json_if_changed(VERSIONS_FILE, document)[0],
+            FILTER_FILE.as_posix(): write_bytes(FILTER_FILE, payload)
+        }
+        self.record_files(files, set())
+        written.update(files)
+
+    def write_manifest(self):
+        with current_tracer().span('manifest', files=len(self.manifest)):
+            entries = dict(sorted(self.manifest.items()))
+            write_json_if_changed(MANIFEST_FILE, {
+                'version': '1.0.0',
+                'generatedAt': now(),
+                'totalFiles': len(entries),
+                'totalBytes': sum(entry['size'] for entry in entries.values()),
+                'files': entries
+            })
+
+    def full_build(self):
+        """Load everything once and write every index file"""
+        tracer = current_tracer()
+        with tracer.span('load-registry'):
+            self.stats = scan_tree()
+            for rel_path in sorted(self.stats):
+                if is_metadata(rel_path):
+                    agent = self.load_agent(rel_path)
+                    if agent is not None:
+                        self.agents[rel_path] = agent
+            self.main = read_json(MAIN_FILE)
+            if FEATURED_FILE.exists():
+                self.featured = self.featured_source = read_json(FEATURED_FILE)
+
+        written, removed = {}, set()
+        with tracer.span('categorize'):
+            categorized = self.categorize()
+        self.details = {}
+        self.write_categories(categorized, list(categorized), written, removed)
+        self.update_featured(written)
+        self.update_main(categorized, written)
+        self.update_sqlite(set(self.by_key()), written)
+
+        with tracer.span('hash-tree'):
+            self.manifest = {}
+            for top in PUBLISHED_DIRS:
+                for path in Path(top).rglob('*'):
+                    if (path.is_file() and path != MANIFEST_FILE and path.as_posix() not in written
+                            and path.as_posix() not in LOCAL_FILES):
+                        sha256, size = hash_file(path)
+                        self.manifest[path.as_posix()] = {'sha256': sha256, 'size': size}
+        self.record_files(written, removed)
+        self.update_versions(written)
+        self.write_manifest()
+        return written
+
+    def rebuild(self, changed):
+        """Apply changed agents/ paths ({path: stat key or None if deleted})"""
+        tracer = current_tracer()
+        touched = set()
+        with tracer.span('parse', files=len(changed)):
+            for rel_path, stat_key in sorted(changed.items()):
+                if not is_metadata(rel_path):
+                    continue
+                old = self.agents.pop(rel_path, None)
+                if old is not None:
+                    touched.add(agent_key(old))
+                if stat_key is None:
+                    continue
+                agent = self.load_agent(rel_path)
+                if agent is None:
+                    # Keep serving the last good version until the file is fixed
+                    if old is not None:
+                        self.agents[rel_path] = old
+                        touched.discard(agent_key(old))
+                    continue
+                self.agents[rel_path] = agent
+                touched.add(agent_key(agent))
+
+        written = {rel_path: None for rel_path, stat_key in changed.items() if stat_key is not None}
+        removed = {rel_path for rel_path, stat_key in changed.items() if stat_key is None}
+        if touched:
+            agents = self.by_key()
+            for key in touched:
+                self.details.pop(key, None)
+                if key not in agents:
+                    path = detail_path({'author': key[0], 'id': key[1]})
+                    if path.exists():
+                        path.unlink()
+                        removed.add(path.as_posix())
+
+            with tracer.span('categorize'):
+                categorized = self.categorize()
+            affected = [
+                slug for slug, category_data in categorized.items()
+                if touched & (self.memberships.get(slug, set()) |
+                              {agent_key(agent) for agent in category_data['agents']})
+            ]
+            self.write_categories(categorized, affected, written, removed)
+            self.update_featured(written)
+            self.update_main(categorized, written)
+            self.update_sqlite(touched, written)
+        self.record_files(written, removed)
+        self.update_versions(written)
+        self.write_manifest()
+        return touched, written, removed
+
+    def poll(self):
+        """Return {path: new stat key or None} for files changed since the last scan"""
+        current = scan_tree()
+        changed = {
+            rel_path: current.get(rel_path)
+            for rel_path in set(current) | set(self.stats)
+            if current.get(rel_path) != self.stats.get(rel_path)
+        }
+        self.stats = current
+        return changed
+
+    def watch(self, interval, settle):
+        """Poll forever, rebuilding after each batch of changes"""
+        while True:
+            time.sleep(interval)
+            changed = self.poll()
+            if not changed:
+                continue
+            # Editors and git often write in several steps; wait for them to settle
+            while True:
+                time.sleep(settle)
+                more = self.poll()
+                if not more:
+                    break
+                changed.update(more)
+
+            newest = max((stat_key[0] for stat_key in changed.values() if stat_key), default=None)
+            started = time.perf_counter()
+            with tracing('watch-rebuild'):
+                touched, written, removed = self.rebuild(changed)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            latency = f', {time.time() - newest / 1e9:.3f}s after the change' if newest else ''
+            print(f'[REBUILD] {len(changed)} changed files, {len(touched)} agents: '
+                  f'{len(written)} written, {len(removed)} removed in {elapsed_ms:.1f}ms{latency}')
+            for rel_path in sorted(written):
+                if not rel_path.startswith(f'{AGENTS_DIR.name}/'):
+                    print(f'  {rel_path}')
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Watch agents/ and rebuild affected index files')
+    parser.add_argument('--interval', type=float, default=0.2, help='Seconds between scans of agents/')
+    parser.add_argument('--settle', type=float, default=0.05,
+                        help='Quiet time after a change before rebuilding')
+    parser.add_argument('--no-sqlite', action='store_true', help='Do not update index/registry.sqlite')
+    parser.add_argument('--once', action='store_true', help='Run the initial full build and exit')
+    args = parser.parse_args()
+
+    # Change to registry directory
+    script_dir = Path(__file__).parent
+    registry_dir = script_dir.parent
+    os.chdir(registry_dir)
+
+    if not MAIN_FILE.exists():
+        print(f'[ERROR] {MAIN_FILE} not found')
+        sys.exit(1)
+
+    watcher = RegistryWatcher(use_sqlite=not args.no_sqlite)
+    started = time.perf_counter()
+    with tracing('watch-registry'):
+        written = watcher.full_build()
+    print(f'Loaded {len(watcher.agents)} agents, wrote {len(written)} files '
+          f'in {(time.perf_counter() - started) * 1000:.1f}ms')
+    if args.once:
+        return
+
+    print(f'Watching {AGENTS_DIR}/ every {args.interval}s (Ctrl+C to stop)')
+    try:
+        watcher.watch(args.interval, args.settle)
+    except KeyboardInterrupt:
+        print('\nStopped')
+
+if __name__ == '__main__':
+    main()